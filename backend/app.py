@@ -3,26 +3,40 @@ FastAPI Application for Illegal Mining Detection
 Complete end-to-end system following approach.txt specifications
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from pydantic import BaseModel
-from typing import Dict, List, Optional, Any
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, List, Optional, Any, Tuple, Literal
 import logging
 import asyncio
 import os
-import json
 import uuid
+import time
+import hashlib
 from datetime import datetime
 import tempfile
 import shutil
 import math
+import aiofiles
+from jinja2 import Template
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import anyio.to_thread
+from collections import OrderedDict
+import numpy as np
+import orjson
+import shapely
+import geopandas as gpd
+from shapely.geometry import Polygon
+from pyproj import Geod
 
 # Import our modules
-from gee_utils import GEEUtils, download_sentinel2_aoi, download_dem, download_sentinel1_sar
+from gee_utils import get_gee_utils, gee_utils_initialized, download_sentinel2_aoi, download_dem, download_sentinel1_sar
 from preprocess import Preprocessor, normalize_bands, fill_dem_voids
 from detect_indices import MiningDetector, detect_mining_areas
 from compare_with_lease import IllegalMiningDetector, compare_with_lease, read_lease_shapefile
+from job_store import JobStore, dumps_payload, JOB_TTL_SECONDS, REDIS_URL, JOB_STORE_PATH
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -32,7 +46,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Illegal Mining Detection API",
     description="End-to-end system for detecting illegal mining activities using satellite imagery",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -44,19 +59,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variables for storing analysis results
-analysis_results = {}
+class EventStreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip that passes Server-Sent Event streams through untouched; the gzip
+    stream would otherwise hold every progress event back until the job ends"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/events"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress JSON/GeoJSON responses (repeated keys compress ~10x); bodies under
+# 1 KiB gain little, and level 5 is close to level 6's ratio for less CPU
+app.add_middleware(EventStreamAwareGZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Analysis job state (shared via Redis when REDIS_URL is set)
+analysis_store = JobStore('analysis')
+
+# Request fingerprint -> job_id, so identical submissions reuse one analysis
+analysis_cache = JobStore('analysis_cache')
 
 # Pydantic models
+class PolygonGeometry(BaseModel):
+    """GeoJSON Polygon geometry; malformed AOIs are rejected with 422 before any download starts"""
+    type: Literal["Polygon"]
+    coordinates: List[List[List[float]]]
+    bbox: Optional[List[float]] = None
+
+    model_config = ConfigDict(extra="forbid")
+
 class AOIRequest(BaseModel):
-    aoi_geojson: Dict[str, Any]
+    aoi_geojson: PolygonGeometry
     start_date: str
     end_date: str
     use_sar: bool = False
     max_cloud_cover: int = 20
 
 class DetectionRequest(BaseModel):
-    aoi_geojson: Dict[str, Any]
+    aoi_geojson: PolygonGeometry
     start_date: str
     end_date: str
     lease_file_path: Optional[str] = None
@@ -71,78 +111,192 @@ class AnalysisStatus(BaseModel):
     timestamp: str
     progress: Optional[int] = None
 
-# Initialize modules
-gee_utils = GEEUtils()
+# Initialize modules (Earth Engine is initialized lazily by the first analysis,
+# so the API starts and answers health checks without GEE credentials)
 preprocessor = Preprocessor()
 mining_detector = MiningDetector()
 illegal_detector = IllegalMiningDetector()
 
-# In-memory store for demo analyses
-demo_jobs: Dict[str, Any] = {}
+# Plain-text analysis report, compiled once; summary fields use item lookups
+# since the statistics are a plain dict (attribute syntax tries getattr first)
+_REPORT_TEMPLATE = Template("""ILLEGAL MINING DETECTION REPORT
+========================================
+
+Job ID: {{ job_id }}
+Generated: {{ timestamp }}
+
+SUMMARY STATISTICS
+--------------------
+Total detected areas: {{ summary['total_detected_areas'] }}
+Legal areas: {{ summary['legal_areas'] }}
+Illegal areas: {{ summary['illegal_areas'] }}
+Mixed areas: {{ summary['mixed_areas'] }}
+Total detected area: {{ summary['total_detected_area_ha'] }} hectares
+Legal area: {{ summary['legal_area_ha'] }} hectares
+Illegal area: {{ summary['illegal_area_ha'] }} hectares
+Compliance rate: {{ summary['compliance_rate_percent'] }}%
+Violation rate: {{ summary['violation_rate_percent'] }}%
+""", keep_trailing_newline=True)
+
+# WGS84 ellipsoid for geodesic (true) area of lon/lat geometries
+_GEOD = Geod(ellps='WGS84')
+
+# Scratch root for per-analysis rasters; tmpfs keeps stage-to-stage GeoTIFF I/O in RAM
+ANALYSIS_SCRATCH = os.getenv('ANALYSIS_SCRATCH', '/dev/shm/mining')
+ANALYSIS_SCRATCH_MIN_FREE_BYTES = int(os.getenv('ANALYSIS_SCRATCH_MIN_FREE_BYTES', str(4 << 30)))
+
+# Chunk size for streaming lease uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# API worker processes; several workers only see each other's jobs through
+# Redis or the SQLite store, so a single in-memory worker is the default
+API_WORKERS = int(os.getenv('API_WORKERS', os.cpu_count() if REDIS_URL or JOB_STORE_PATH else 1))
+
+# Worker processes for CPU-bound raster work, keeping the event loop responsive.
+# Every API worker gets its own pool, so by default the host's CPUs are split
+# between the workers rather than each worker claiming all of them
+PROCESS_POOL_WORKERS = int(os.getenv('PROCESS_POOL_WORKERS', max(1, (os.cpu_count() or 1) // API_WORKERS)))
+
+# Threads for blocking I/O: anyio's pool serves sync endpoints/dependencies, the
+# asyncio default executor serves asyncio.to_thread (downloads, GDAL reads, stats).
+# Both are per worker, so the defaults split a per-host budget of 200 and 64
+# threads across API_WORKERS (never below anyio's own default of 40, and 8);
+# Earth Engine downloads are bounded separately by GEE_MAX_PARALLEL_DOWNLOADS
+ANYIO_THREAD_TOKENS = int(os.getenv('ANYIO_THREAD_TOKENS', max(40, 200 // API_WORKERS)))
+IO_THREAD_POOL_SIZE = int(os.getenv('IO_THREAD_POOL_SIZE', max(8, 64 // API_WORKERS)))
+
+# Analyses allowed to run at once per worker; later submissions wait in "queued"
+MAX_CONCURRENT_JOBS = int(os.getenv('MAX_CONCURRENT_JOBS', '4'))
+
+# Store for demo analyses
+demo_store = JobStore('demo')
+
+# How often expired jobs (and their temp directories) are swept
+JOB_SWEEP_INTERVAL_SECONDS = int(os.getenv('JOB_SWEEP_INTERVAL_SECONDS', '600'))
+
+# Encoded /api/results bodies and rendered reports (with their ETags) of
+# completed jobs, which are immutable once completed; LRU-bounded
+RESULTS_CACHE_SIZE = int(os.getenv('RESULTS_CACHE_SIZE', '64'))
+_completed_results_json: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+_report_bodies: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+
+# How often the progress event stream re-reads a job's state
+PROGRESS_POLL_SECONDS = float(os.getenv('PROGRESS_POLL_SECONDS', '1'))
+
+# Export files produced by IllegalMiningDetector.export_results
+ExportFileType = Literal['geojson', 'shapefile', 'csv', 'summary']
+EXPORT_MEDIA_TYPES = {
+    'geojson': 'application/geo+json',
+    'shapefile': 'application/zip',
+    'csv': 'text/csv',
+    'summary': 'application/json'
+}
+
+# Completed job artifacts never change for as long as the job is stored
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={JOB_TTL_SECONDS}, immutable"
+
+# Polled listings may change at any time; clients revalidate them with If-None-Match
+REVALIDATE_CACHE_CONTROL = "no-cache"
+DEMO_CACHE_CONTROL = f"public, max-age={int(os.getenv('DEMO_CACHE_MAX_AGE', '60'))}"
 
 # ------------------------------
 # Demo data generators (for hackathon demo mode)
 # ------------------------------
 
-def _box_from_center(center_lon: float, center_lat: float, dx_deg: float, dy_deg: float):
-    minx = center_lon - dx_deg / 2.0
-    maxx = center_lon + dx_deg / 2.0
-    miny = center_lat - dy_deg / 2.0
-    maxy = center_lat + dy_deg / 2.0
-    return [
-        [minx, miny], [maxx, miny], [maxx, maxy], [minx, maxy], [minx, miny]
-    ]
+# Rough metres per degree, good enough for demo-scale area figures
+_METERS_PER_DEGREE = 111000.0
+
+# 12 sample legal leases across India (approximate centers)
+_DEMO_LEASE_CENTERS = np.array([
+    (73.8, 15.3), (75.7, 15.6), (85.8, 20.5), (86.4, 23.6),
+    (81.9, 20.6), (73.2, 22.5), (74.0, 18.9), (78.5, 17.5),
+    (79.7, 15.9), (75.8, 26.9), (77.4, 23.3), (78.7, 11.1)
+])
+_DEMO_LEASE_STATES = [
+    'Goa', 'Karnataka', 'Odisha', 'Jharkhand', 'Chhattisgarh', 'Gujarat',
+    'Maharashtra', 'Telangana', 'Andhra Pradesh', 'Rajasthan', 'Madhya Pradesh', 'Tamil Nadu'
+]
+_DEMO_MINERALS = ['Iron Ore', 'Limestone', 'Bauxite', 'Manganese', 'Dolomite', 'Granite']
+
+# A few detections (some inside, some near leases): center, size and confidence
+_DEMO_DETECTION_CENTERS = np.array([
+    (73.82, 15.35), (86.45, 23.62), (81.88, 20.58),
+    (75.78, 26.92), (78.55, 17.52), (79.72, 15.92)
+])
+_DEMO_DETECTION_SIZES = np.array([
+    (0.06, 0.05), (0.07, 0.05), (0.05, 0.04),
+    (0.04, 0.04), (0.05, 0.05), (0.05, 0.04)
+])
+_DEMO_DETECTION_CONFIDENCE = [0.82, 0.77, 0.88, 0.71, 0.80, 0.69]
+_DEMO_DETECTION_SEVERITY = ['High', 'Medium', 'High', 'Low', 'High', 'Medium']
+
+# Violation zones for demo (4 critical + 4 warning areas)
+_DEMO_RED_CENTERS = np.array([(86.47, 23.64), (79.75, 15.95), (73.85, 15.32), (85.82, 20.52)])
+_DEMO_ORANGE_CENTERS = np.array([(81.90, 20.60), (78.58, 17.54), (75.80, 26.95), (74.05, 18.92)])
+
+def _boxes_from_centers(centers: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """Build closed rectangular rings of shape (N, 5, 2) for N (lon, lat) centers"""
+    half = np.broadcast_to(sizes, centers.shape) / 2.0
+    mins = centers - half
+    maxs = centers + half
+    # Fill one preallocated output instead of stacking intermediate arrays
+    out = np.empty((len(centers), 5, 2), dtype=np.float64)
+    out[:, 0] = mins
+    out[:, 1, 0] = maxs[:, 0]
+    out[:, 1, 1] = mins[:, 1]
+    out[:, 2] = maxs
+    out[:, 3, 0] = mins[:, 0]
+    out[:, 3, 1] = maxs[:, 1]
+    out[:, 4] = mins
+    return out
+
+def _box_areas_hectares(sizes: np.ndarray, count: int) -> np.ndarray:
+    """Approximate areas (ha) of degree-sized boxes"""
+    sizes = np.broadcast_to(sizes, (count, 2))
+    return sizes[:, 0] * sizes[:, 1] * _METERS_PER_DEGREE ** 2 / 10000.0
 
 def _demo_legal_leases_geojson():
-    # 12 sample legal leases across India (approximate centers)
-    samples = [
-        (73.8, 15.3, 'Goa'),
-        (75.7, 15.6, 'Karnataka'),
-        (85.8, 20.5, 'Odisha'),
-        (86.4, 23.6, 'Jharkhand'),
-        (81.9, 20.6, 'Chhattisgarh'),
-        (73.2, 22.5, 'Gujarat'),
-        (74.0, 18.9, 'Maharashtra'),
-        (78.5, 17.5, 'Telangana'),
-        (79.7, 15.9, 'Andhra Pradesh'),
-        (75.8, 26.9, 'Rajasthan'),
-        (77.4, 23.3, 'Madhya Pradesh'),
-        (78.7, 11.1, 'Tamil Nadu')
-    ]
+    # size ~ 0.18 x 0.18 degrees (varies by latitude, but OK for demo)
+    count = len(_DEMO_LEASE_CENTERS)
+    rings = _boxes_from_centers(_DEMO_LEASE_CENTERS, np.array([0.18, 0.18]))
+    areas_ha = np.round(_box_areas_hectares(np.array([0.18, 0.18]), count), 2).tolist()
+    idx = np.arange(1, count + 1)
+    production = ((idx * 10) % 150 + 20).tolist()
+    value = ((idx * 75) % 500 + 100).tolist()
+    minerals = [_DEMO_MINERALS[i % len(_DEMO_MINERALS)] for i in idx.tolist()]
 
-    features = []
-    minerals = ['Iron Ore', 'Limestone', 'Bauxite', 'Manganese', 'Dolomite', 'Granite']
-    for idx, (lon, lat, state) in enumerate(samples, start=1):
-        # size ~ 0.18 x 0.18 degrees (varies by latitude, but OK for demo)
-        coords = _box_from_center(lon, lat, 0.18, 0.18)
-        area_ha = 0.18 * 0.18 * 111000 * 111000 / 10000.0
-        mineral = minerals[idx % len(minerals)]
-        features.append({
+    features = [
+        {
             "type": "Feature",
             "properties": {
-                "lease_id": f"DEMO_LEASE_{idx:02d}",
-                "lease_name": f"Demo Mining Lease {idx}",
+                "lease_id": f"DEMO_LEASE_{i:02d}",
+                "lease_name": f"Demo Mining Lease {i}",
                 "state": state,
                 "district": "Demo District",
                 "mineral": mineral,
-                "area_hectares": round(area_ha, 2),
+                "area_hectares": area_ha,
                 "lease_type": "Prospecting License",
                 "valid_from": "2019-04-01",
                 "valid_to": "2039-03-31",
-                "production_2024": f"{(idx*10)%150 + 20} kt",
-                "value_2024": f"₹{(idx*75)%500 + 100} cr"
+                "production_2024": f"{prod} kt",
+                "value_2024": f"₹{val} cr"
             },
             "geometry": {
                 "type": "Polygon",
-                "coordinates": [coords]
+                "coordinates": [ring]
             }
-        })
+        }
+        for i, state, mineral, area_ha, prod, val, ring in zip(
+            idx.tolist(), _DEMO_LEASE_STATES, minerals, areas_ha, production, value, rings
+        )
+    ]
 
+    # Summary straight from the attribute arrays instead of re-walking the features
     summary = {
         "total_leases": len(features),
-        "total_area_hectares": round(sum(f["properties"]["area_hectares"] for f in features), 1),
-        "states": sorted(list({f["properties"]["state"] for f in features})),
-        "minerals": sorted(list({f["properties"]["mineral"] for f in features})),
+        "total_area_hectares": round(sum(areas_ha), 1),
+        "states": sorted(set(_DEMO_LEASE_STATES)),
+        "minerals": sorted(set(minerals)),
         "value_2024_crores": {"total_value": 1250}
     }
 
@@ -151,39 +305,40 @@ def _demo_legal_leases_geojson():
         "features": features
     }, summary
 
-def _demo_satellite_detections_geojson():
-    # A few detections (some inside, some near leases)
-    detections = [
-        (73.82, 15.35, 0.06, 0.05, 0.82, 'High'),
-        (86.45, 23.62, 0.07, 0.05, 0.77, 'Medium'),
-        (81.88, 20.58, 0.05, 0.04, 0.88, 'High'),
-        (75.78, 26.92, 0.04, 0.04, 0.71, 'Low'),
-        (78.55, 17.52, 0.05, 0.05, 0.80, 'High'),
-        (79.72, 15.92, 0.05, 0.04, 0.69, 'Medium')
-    ]
+def _demo_satellite_detections_geojson(detection_date: Optional[str] = None):
+    if detection_date is None:
+        detection_date = datetime.now().date().isoformat()
+    count = len(_DEMO_DETECTION_CENTERS)
+    rings = _boxes_from_centers(_DEMO_DETECTION_CENTERS, _DEMO_DETECTION_SIZES)
+    areas_ha = np.round(_box_areas_hectares(_DEMO_DETECTION_SIZES, count), 2).tolist()
+    idx = np.arange(1, count + 1)
+    ndvi = np.round(0.2 + (idx % 5) * 0.05, 2).tolist()
+    bsi = np.round(0.5 + (idx % 3) * 0.1, 2).tolist()
 
-    features = []
-    for i, (lon, lat, dx, dy, conf, sev) in enumerate(detections, start=1):
-        coords = _box_from_center(lon, lat, dx, dy)
-        area_ha = dx * dy * 111000 * 111000 / 10000.0
-        features.append({
+    features = [
+        {
             "type": "Feature",
             "properties": {
                 "id": f"DEMO_DET_{i:02d}",
                 "source": "Spectral analysis (demo)",
-                "area_hectares": round(area_ha, 2),
+                "area_hectares": area_ha,
                 "confidence": conf,
-                "ndvi": round(0.2 + (i % 5) * 0.05, 2),
-                "bsi": round(0.5 + (i % 3) * 0.1, 2),
+                "ndvi": ndvi_i,
+                "bsi": bsi_i,
                 "resolution": "10 m",
-                "detection_date": datetime.now().date().isoformat(),
+                "detection_date": detection_date,
                 "severity": sev
             },
             "geometry": {
                 "type": "Polygon",
-                "coordinates": [coords]
+                "coordinates": [ring]
             }
-        })
+        }
+        for i, area_ha, conf, ndvi_i, bsi_i, sev, ring in zip(
+            idx.tolist(), areas_ha, _DEMO_DETECTION_CONFIDENCE, ndvi, bsi,
+            _DEMO_DETECTION_SEVERITY, rings
+        )
+    ]
 
     return {
         "type": "FeatureCollection",
@@ -191,32 +346,179 @@ def _demo_satellite_detections_geojson():
     }
 
 def _demo_violation_zones_geojson():
-    # Create more violation zones for demo (4-5 illegal areas)
-    red_centers = [ (86.47, 23.64), (79.75, 15.95), (73.85, 15.32), (85.82, 20.52) ]
-    orange_centers = [ (81.90, 20.60), (78.58, 17.54), (75.80, 26.95), (74.05, 18.92) ]
-
-    def zone_feature(lon, lat, dx, dy, color_name):
-        coords = _box_from_center(lon, lat, dx, dy)
-        area_ha = dx * dy * 111000 * 111000 / 10000.0
-        return {
-            "type": "Feature",
-            "properties": {
-                "area_hectares": round(area_ha, 2),
-                "confidence": 0.85 if color_name == 'red' else 0.65,
-                "description": "Illegal mining violation (demo)",
-                "zone": color_name
-            },
-            "geometry": {"type": "Polygon", "coordinates": [coords]}
-        }
+    def zone_features(centers, dx, dy, color_name):
+        size = np.array([dx, dy])
+        rings = _boxes_from_centers(centers, size)
+        area_ha = round(float(_box_areas_hectares(size, 1)[0]), 2)
+        return [
+            {
+                "type": "Feature",
+                "properties": {
+                    "area_hectares": area_ha,
+                    "confidence": 0.85 if color_name == 'red' else 0.65,
+                    "description": "Illegal mining violation (demo)",
+                    "zone": color_name
+                },
+                "geometry": {"type": "Polygon", "coordinates": [ring]}
+            }
+            for ring in rings
+        ]
 
-    red_features = [ zone_feature(lon, lat, 0.08, 0.06, 'red') for lon, lat in red_centers ]
-    orange_features = [ zone_feature(lon, lat, 0.06, 0.05, 'orange') for lon, lat in orange_centers ]
+    red_features = zone_features(_DEMO_RED_CENTERS, 0.08, 0.06, 'red')
+    orange_features = zone_features(_DEMO_ORANGE_CENTERS, 0.06, 0.05, 'orange')
 
     return (
         {"type": "FeatureCollection", "features": red_features},
         {"type": "FeatureCollection", "features": orange_features}
     )
 
+# Demo payloads are static, so build them once at import instead of per request
+_CACHED_LEASES_GEOJSON, _CACHED_LEASES_SUMMARY = _demo_legal_leases_geojson()
+_CACHED_DETECTIONS_DATE = datetime.now().date().isoformat()
+_CACHED_DETECTIONS_GEOJSON = _demo_satellite_detections_geojson(_CACHED_DETECTIONS_DATE)
+
+# Pre-serialized copies embedded verbatim into each response by orjson; ring
+# coordinates stay (5, 2) ndarrays and are written straight from their buffers
+_CACHED_LEASES_BYTES = dumps_payload(_CACHED_LEASES_GEOJSON)
+_CACHED_LEASES_SUMMARY_BYTES = orjson.dumps(_CACHED_LEASES_SUMMARY)
+_CACHED_DETECTIONS_BYTES = dumps_payload(_CACHED_DETECTIONS_GEOJSON)
+_CACHED_LEASES_JSON = orjson.Fragment(_CACHED_LEASES_BYTES)
+_CACHED_LEASES_SUMMARY_JSON = orjson.Fragment(_CACHED_LEASES_SUMMARY_BYTES)
+_CACHED_DETECTIONS_JSON = orjson.Fragment(_CACHED_DETECTIONS_BYTES)
+
+# Demo violation zones and counters are identical for every demo analysis
+_DEMO_RED_GEOJSON, _DEMO_ORANGE_GEOJSON = _demo_violation_zones_geojson()
+_DEMO_VIOLATION_SUMMARY_JSON = orjson.Fragment(orjson.dumps({
+    "total_legal_leases": 12,
+    "total_satellite_detections": 6,
+    "critical_violations": len(_DEMO_RED_GEOJSON["features"]),
+    "warning_violations": len(_DEMO_ORANGE_GEOJSON["features"]),
+    "total_violations": len(_DEMO_RED_GEOJSON["features"]) + len(_DEMO_ORANGE_GEOJSON["features"])
+}))
+_DEMO_VIOLATION_ZONES_JSON = orjson.Fragment(dumps_payload({
+    "red_zones_geojson": _DEMO_RED_GEOJSON,
+    "orange_zones_geojson": _DEMO_ORANGE_GEOJSON
+}))
+
+def _refresh_cached_detections(today_iso: str) -> None:
+    """Rebuild the cached demo detections when the date rolls over (detection_date field)"""
+    global _CACHED_DETECTIONS_DATE, _CACHED_DETECTIONS_GEOJSON, _CACHED_DETECTIONS_JSON, _CACHED_DETECTIONS_ETAG
+    if today_iso == _CACHED_DETECTIONS_DATE:
+        return
+    _CACHED_DETECTIONS_GEOJSON = _demo_satellite_detections_geojson(today_iso)
+    detections_bytes = dumps_payload(_CACHED_DETECTIONS_GEOJSON)
+    _CACHED_DETECTIONS_JSON = orjson.Fragment(detections_bytes)
+    _CACHED_DETECTIONS_ETAG = "W/" + _bytes_etag(detections_bytes)
+    _CACHED_DETECTIONS_DATE = today_iso
+
+_cached_now_iso: Tuple[int, str] = (-1, "")
+
+def _now_iso() -> str:
+    """Wall-clock isoformat timestamp, re-read at most once per second and shared by every request handler"""
+    global _cached_now_iso
+    bucket = int(time.monotonic())
+    if _cached_now_iso[0] != bucket:
+        _cached_now_iso = (bucket, datetime.now().isoformat())
+    return _cached_now_iso[1]
+
+def _bytes_etag(body: bytes) -> str:
+    """Strong ETag for a response body"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def _file_etag(stat_result: os.stat_result) -> str:
+    """Strong ETag for a file from its modification time and size"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already names this ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored on both sides
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def _cached_json_response(
+    request: Request, body: bytes, etag: str, cache_control: str = IMMUTABLE_CACHE_CONTROL
+) -> Response:
+    """Serve a JSON body with its ETag, or 304 when the client already holds it"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _demo_json_response(request: Request, etag: str, payload: Dict[str, Any]) -> Response:
+    """Serve a demo payload under a weak ETag of its data, so unchanged polls skip encoding and transfer"""
+    headers = {"ETag": etag, "Cache-Control": DEMO_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=dumps_payload(payload), media_type="application/json", headers=headers)
+
+# Weak ETags of the demo data; the per-response timestamp is deliberately left out
+_CACHED_LEASES_ETAG = "W/" + _bytes_etag(_CACHED_LEASES_BYTES + _CACHED_LEASES_SUMMARY_BYTES)
+_CACHED_DETECTIONS_ETAG = "W/" + _bytes_etag(_CACHED_DETECTIONS_BYTES)
+
+def _drop_cached_bodies(job_id: str) -> None:
+    """Forget every cached body of a job the store no longer holds"""
+    _completed_results_json.pop(job_id, None)
+    _report_bodies.pop(job_id, None)
+
+async def _cached_job_body(cache: "OrderedDict[str, Tuple[bytes, str]]", job_id: str) -> Optional[Tuple[bytes, str]]:
+    """
+    Cached (body, etag) of a completed job, served only while the job is still stored
+    
+    The store evicts and expires jobs on its own (2Q eviction, Redis/SQLite
+    TTLs), so each hit is checked against it with a payload-free existence
+    lookup; bodies of jobs that are gone are dropped instead of served.
+    """
+    cached = cache.get(job_id)
+    if cached is None:
+        return None
+    if not await analysis_store.contains(job_id):
+        _drop_cached_bodies(job_id)
+        return None
+    if job_id in cache:
+        cache.move_to_end(job_id)
+    return cached
+
+def _json_bytes_response(payload: Dict[str, Any]) -> Response:
+    """Serialize a payload (which may hold pre-serialized fragments or numpy values) into a JSON response"""
+    return Response(content=dumps_payload(payload), media_type="application/json")
+
+async def _sweep_expired_jobs():
+    """Periodically drop expired jobs so memory and scratch disk stay bounded"""
+    while True:
+        await asyncio.sleep(JOB_SWEEP_INTERVAL_SECONDS)
+        try:
+            await analysis_store.expire()
+            await demo_store.expire()
+        except Exception as e:
+            logger.error(f"❌ Error sweeping expired jobs: {e}")
+
+@app.on_event("startup")
+async def start_job_sweeper():
+    app.state.job_sweeper = asyncio.create_task(_sweep_expired_jobs())
+
+@app.on_event("startup")
+async def configure_thread_pools():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = ANYIO_THREAD_TOKENS
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=IO_THREAD_POOL_SIZE, thread_name_prefix="io")
+    )
+
+@app.on_event("startup")
+async def create_analysis_slots():
+    app.state.analysis_slots = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+
+@app.on_event("startup")
+async def create_process_pool():
+    # Created per worker process after the fork, never at import
+    app.state.process_executor = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS)
+
+@app.on_event("shutdown")
+async def shutdown_process_pool():
+    app.state.process_executor.shutdown(wait=False, cancel_futures=True)
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -226,8 +528,10 @@ async def root():
         "status": "operational",
         "endpoints": [
             "/api/upload-lease",
+            "/api/upload-lease/stream",
             "/api/detect",
             "/api/results/{job_id}",
+            "/api/results/{job_id}/events",
             "/api/report/{job_id}",
             "/api/health",
             "/api/mining-boundaries",
@@ -239,7 +543,7 @@ async def root():
     }
 
 @app.get("/api/mining-boundaries")
-async def get_mining_boundaries():
+async def get_mining_boundaries(request: Request):
     """
     Get demo legal mining lease boundaries (12 sample leases across India)
     
@@ -247,20 +551,19 @@ async def get_mining_boundaries():
         Dict: GeoJSON FeatureCollection of legal mining leases with summary statistics
     """
     try:
-        geojson, summary = _demo_legal_leases_geojson()
-        return {
+        return _demo_json_response(request, _CACHED_LEASES_ETAG, {
             "status": "success",
             "message": "Demo legal mining boundaries (12 leases across India)",
-            "boundaries": geojson,
-            "summary": summary,
-            "timestamp": datetime.now().isoformat()
-        }
+            "boundaries": _CACHED_LEASES_JSON,
+            "summary": _CACHED_LEASES_SUMMARY_JSON,
+            "timestamp": _now_iso()
+        })
     except Exception as e:
         logger.error(f"❌ Error fetching mining boundaries: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/satellite-data")
-async def get_satellite_data():
+async def get_satellite_data(request: Request):
     """
     Get demo satellite-detected mining areas
     
@@ -268,38 +571,50 @@ async def get_satellite_data():
         Dict: GeoJSON FeatureCollection of satellite-detected mining areas
     """
     try:
-        geojson = _demo_satellite_detections_geojson()
-        return {
+        now_iso = _now_iso()
+        _refresh_cached_detections(now_iso[:10])
+        return _demo_json_response(request, _CACHED_DETECTIONS_ETAG, {
             "status": "success",
             "message": "Demo satellite-detected mining areas",
-            "geojson": geojson,
-            "total_areas": len(geojson["features"]),
-            "timestamp": datetime.now().isoformat()
-        }
+            "geojson": _CACHED_DETECTIONS_JSON,
+            "total_areas": len(_CACHED_DETECTIONS_GEOJSON["features"]),
+            "timestamp": now_iso
+        })
     except Exception as e:
         logger.error(f"❌ Error fetching satellite data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/analyze/quick")
-async def analyze_quick(request: Dict[str, Any]):
+async def analyze_quick(request: Request):
     """
     Quick analysis endpoint (demo mode)
     
+    The body is an arbitrary JSON object, so it is decoded with orjson
+    directly rather than validated as a Dict[str, Any] model.
+    
     Args:
-        request: Analysis request parameters
+        request: Analysis request; JSON object of parameters
         
     Returns:
         Dict: Analysis results
     """
     try:
-        logger.info(f"🚀 Quick analysis started: {request.get('analysis_name', 'unnamed')}")
+        params = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+    if not isinstance(params, dict):
+        raise HTTPException(status_code=422, detail="Request body must be a JSON object")
+    
+    try:
+        analysis_name = params.get("analysis_name", "unnamed")
+        logger.info(f"🚀 Quick analysis started: {analysis_name}")
         
         # Return immediate success for demo
         return {
             "status": "success",
             "message": "Quick analysis completed",
-            "analysis_name": request.get("analysis_name", "unnamed"),
-            "timestamp": datetime.now().isoformat()
+            "analysis_name": analysis_name,
+            "timestamp": _now_iso()
         }
     except Exception as e:
         logger.error(f"❌ Error in quick analysis: {e}")
@@ -315,35 +630,22 @@ async def analyze_illegal_mining():
     """
     try:
         analysis_id = f"demo_analysis_{uuid.uuid4().hex[:8]}"
+        now_iso = _now_iso()
         logger.info(f"🚨 Illegal mining detection started: {analysis_id}")
         
-        # Generate demo violation zones
-        red_geojson, orange_geojson = _demo_violation_zones_geojson()
-        
-        # Store demo results immediately
-        demo_jobs[analysis_id] = {
+        # Store demo job immediately; the shared violation zones are attached on read
+        await demo_store.set(analysis_id, {
             "analysis_id": analysis_id,
             "status": "completed",
             "message": "Demo illegal mining detection completed",
-            "timestamp": datetime.now().isoformat(),
-            "analysis_summary": {
-                "total_legal_leases": 12,
-                "total_satellite_detections": 6,
-                "critical_violations": len(red_geojson["features"]),
-                "warning_violations": len(orange_geojson["features"]),
-                "total_violations": len(red_geojson["features"]) + len(orange_geojson["features"])
-            },
-            "violation_zones": {
-                "red_zones_geojson": red_geojson,
-                "orange_zones_geojson": orange_geojson
-            }
-        }
+            "timestamp": now_iso
+        })
         
         return {
             "status": "success",
             "message": "Illegal mining detection initiated",
             "analysis_id": analysis_id,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso
         }
     except Exception as e:
         logger.error(f"❌ Error starting illegal mining detection: {e}")
@@ -360,19 +662,24 @@ async def get_illegal_mining_results(analysis_id: str):
     Returns:
         Dict: Analysis results with violation zones
     """
-    if analysis_id not in demo_jobs:
+    job = await demo_store.get(analysis_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Analysis not found")
     
-    return demo_jobs[analysis_id]
+    return _json_bytes_response({
+        **job,
+        "analysis_summary": _DEMO_VIOLATION_SUMMARY_JSON,
+        "violation_zones": _DEMO_VIOLATION_ZONES_JSON
+    })
 
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _now_iso(),
         "modules": {
-            "gee_utils": "ready",
+            "gee_utils": "ready" if gee_utils_initialized() else "initializes on first analysis",
             "preprocessor": "ready", 
             "mining_detector": "ready",
             "illegal_detector": "ready"
@@ -390,48 +697,89 @@ async def upload_lease(file: UploadFile = File(...)):
     Returns:
         Dict: Upload status and file info
     """
+    filename = _safe_upload_name(file.filename)
     try:
-        logger.info(f"📁 Uploading lease file: {file.filename}")
+        logger.info(f"📁 Uploading lease file: {filename}")
         
         # Create temporary directory
         temp_dir = tempfile.mkdtemp()
-        file_path = os.path.join(temp_dir, file.filename)
-        
-        # Save uploaded file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Read and validate lease file
-        lease_gdf = illegal_detector.read_lease_shapefile(file_path)
-        
-        if lease_gdf.empty:
-            raise HTTPException(status_code=400, detail="Invalid or empty lease file")
-        
-        # Generate file info
-        file_info = {
-            "filename": file.filename,
-            "file_size": os.path.getsize(file_path),
-            "num_leases": len(lease_gdf),
-            "total_area_ha": round(lease_gdf.geometry.to_crs('EPSG:3857').area.sum() / 10000, 2),
-            "bounds": lease_gdf.total_bounds.tolist(),
-            "crs": str(lease_gdf.crs),
-            "columns": list(lease_gdf.columns),
-            "file_path": file_path
-        }
+        file_path = os.path.join(temp_dir, filename)
         
-        logger.info(f"✅ Lease file uploaded: {len(lease_gdf)} leases")
+        # Copy the spooled upload to disk in 1 MiB chunks, in one worker-thread
+        # hop rather than two per chunk
+        await asyncio.to_thread(_copy_upload, file.file, file_path)
         
-        return {
-            "status": "success",
-            "message": "Lease file uploaded successfully",
-            "file_info": file_info,
-            "timestamp": datetime.now().isoformat()
-        }
+        return await _lease_upload_response(filename, file_path)
+        
+    except Exception as e:
+        logger.error(f"❌ Error uploading lease file: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/upload-lease/stream")
+async def upload_lease_stream(request: Request, filename: str):
+    """
+    Upload lease boundaries sent as the raw request body
+    
+    Skips multipart parsing and Starlette's spooled temp file, so large
+    zipped shapefiles are written to disk once.
+    
+    Args:
+        request: Request whose body is the lease file
+        filename: Original file name (its extension selects the reader)
+        
+    Returns:
+        Dict: Upload status and file info
+    """
+    filename = _safe_upload_name(filename)
+    try:
+        logger.info(f"📁 Streaming lease file: {filename}")
+        
+        temp_dir = tempfile.mkdtemp()
+        file_path = os.path.join(temp_dir, filename)
+        
+        async with aiofiles.open(file_path, "wb") as buffer:
+            async for chunk in request.stream():
+                if chunk:
+                    await buffer.write(chunk)
+        
+        return await _lease_upload_response(filename, file_path)
         
     except Exception as e:
         logger.error(f"❌ Error uploading lease file: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _lease_upload_response(filename: str, file_path: str) -> Dict[str, Any]:
+    """Validate an uploaded lease file and describe it"""
+    # Read and validate lease file (fiona/GDAL I/O is synchronous)
+    lease_gdf = await asyncio.to_thread(illegal_detector.read_lease_shapefile, file_path)
+    
+    if lease_gdf.empty:
+        raise HTTPException(status_code=400, detail="Invalid or empty lease file")
+    
+    # Geodesic area walks every ring; keep it off the event loop too
+    total_area_ha = await asyncio.to_thread(_geodesic_area_ha, lease_gdf)
+    
+    # Generate file info
+    file_info = {
+        "filename": filename,
+        "file_size": os.path.getsize(file_path),
+        "num_leases": len(lease_gdf),
+        "total_area_ha": round(total_area_ha, 2),
+        "bounds": lease_gdf.total_bounds.tolist(),
+        "crs": str(lease_gdf.crs),
+        "columns": list(lease_gdf.columns),
+        "file_path": file_path
+    }
+    
+    logger.info(f"✅ Lease file uploaded: {len(lease_gdf)} leases")
+    
+    return {
+        "status": "success",
+        "message": "Lease file uploaded successfully",
+        "file_info": file_info,
+        "timestamp": _now_iso()
+    }
+
 @app.post("/api/detect")
 async def detect_illegal_mining(request: DetectionRequest, background_tasks: BackgroundTasks):
     """
@@ -444,20 +792,39 @@ async def detect_illegal_mining(request: DetectionRequest, background_tasks: Bac
         Dict: Job ID and status
     """
     try:
+        # Reuse a pending or completed analysis of the exact same request
+        # Dumped once; feeds both the fingerprint and the stored job record
+        request_fields = request.model_dump()
+        cache_key = await asyncio.to_thread(_analysis_cache_key, request_fields)
+        cached = await analysis_cache.get(cache_key)
+        if cached is not None:
+            job = await analysis_store.get(cached["job_id"])
+            if job is not None and job["status"] != "failed":
+                logger.info(f"♻️ Reusing analysis {cached['job_id']} for identical request")
+                return {
+                    "job_id": cached["job_id"],
+                    "status": job["status"],
+                    "message": "Identical analysis already submitted; reusing its results.",
+                    "timestamp": job["timestamp"],
+                    "cached": True
+                }
+        
         # Generate unique job ID
         job_id = str(uuid.uuid4())
+        now_iso = _now_iso()
         
         logger.info(f"🚀 Starting illegal mining detection: {job_id}")
         
         # Store initial status
-        analysis_results[job_id] = {
+        await analysis_store.set(job_id, {
             "job_id": job_id,
             "status": "processing",
             "message": "Illegal mining detection analysis initiated...",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso,
             "progress": 0,
-            "request": request.dict()
-        }
+            "request": request_fields
+        })
+        await analysis_cache.set(cache_key, {"job_id": job_id})
         
         # Run analysis in background
         background_tasks.add_task(
@@ -468,7 +835,7 @@ async def detect_illegal_mining(request: DetectionRequest, background_tasks: Bac
             "job_id": job_id,
             "status": "processing",
             "message": "Illegal mining detection analysis initiated. This may take several minutes.",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso,
             "estimated_completion_time": "5-15 minutes"
         }
         
@@ -477,143 +844,239 @@ async def detect_illegal_mining(request: DetectionRequest, background_tasks: Bac
         raise HTTPException(status_code=500, detail=str(e))
 
 async def _run_illegal_mining_analysis(job_id: str, request: DetectionRequest):
-    """Background task for illegal mining analysis"""
+    """Background task for illegal mining analysis, bounded to MAX_CONCURRENT_JOBS at a time"""
+    slots = app.state.analysis_slots
+    if slots.locked():
+        await analysis_store.update(job_id, status="queued", message="Waiting for a free analysis slot...")
+    async with slots:
+        await _illegal_mining_analysis(job_id, request)
+
+async def _illegal_mining_analysis(job_id: str, request: DetectionRequest):
+    """Illegal mining analysis pipeline"""
     try:
         logger.info(f"🛰️ Running illegal mining analysis for {job_id}")
+        aoi_geojson = request.aoi_geojson.model_dump(exclude_none=True)
         
         # Update progress
-        analysis_results[job_id]["progress"] = 10
-        analysis_results[job_id]["message"] = "Downloading satellite data..."
+        await analysis_store.update(
+            job_id, status="processing", progress=10, message="Downloading satellite data..."
+        )
         
         # Step 1: Download satellite data
-        temp_dir = tempfile.mkdtemp()
+        temp_dir = _make_scratch_dir()
         sentinel2_path = os.path.join(temp_dir, "sentinel2.tif")
         dem_path = os.path.join(temp_dir, "dem.tif")
         
-        # Download Sentinel-2 data
-        success = gee_utils.download_sentinel2_aoi(
-            request.aoi_geojson,
-            request.start_date,
-            request.end_date,
-            sentinel2_path,
-            max_cloud_cover=20
+        # Download Sentinel-2 and DEM data concurrently, off the event loop
+        gee_utils = await asyncio.to_thread(get_gee_utils)
+        s2_success, dem_success = await asyncio.gather(
+            asyncio.to_thread(
+                gee_utils.download_sentinel2_aoi,
+                aoi_geojson,
+                request.start_date,
+                request.end_date,
+                sentinel2_path,
+                max_cloud_cover=20
+            ),
+            asyncio.to_thread(
+                gee_utils.download_dem,
+                aoi_geojson,
+                dem_path,
+                "SRTM"
+            )
         )
         
-        if not success:
+        if not s2_success:
             raise Exception("Failed to download Sentinel-2 data")
         
-        # Download DEM data
-        success = gee_utils.download_dem(
-            request.aoi_geojson,
-            dem_path,
-            "SRTM"
-        )
-        
-        if not success:
+        if not dem_success:
             raise Exception("Failed to download DEM data")
         
-        analysis_results[job_id]["progress"] = 30
-        analysis_results[job_id]["message"] = "Preprocessing satellite data..."
+        await analysis_store.update(job_id, progress=30, message="Preprocessing satellite data...")
         
         # Step 2: Preprocess data
         normalized_sentinel2 = os.path.join(temp_dir, "sentinel2_normalized.tif")
         filled_dem = os.path.join(temp_dir, "dem_filled.tif")
         
-        # Normalize Sentinel-2 bands
-        preprocessor.normalize_bands(sentinel2_path, normalized_sentinel2)
-        
-        # Fill DEM voids
-        preprocessor.fill_dem_voids(dem_path, filled_dem)
+        # Normalize Sentinel-2 bands and fill DEM voids (independent files) in parallel
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            loop.run_in_executor(
+                app.state.process_executor, preprocessor.normalize_bands, sentinel2_path, normalized_sentinel2
+            ),
+            loop.run_in_executor(
+                app.state.process_executor, preprocessor.fill_dem_voids, dem_path, filled_dem
+            )
+        )
         
-        analysis_results[job_id]["progress"] = 50
-        analysis_results[job_id]["message"] = "Detecting mining activities..."
+        await analysis_store.update(job_id, progress=50, message="Detecting mining activities...")
         
-        # Step 3: Detect mining areas
-        detection_results = mining_detector.detect_mining_areas(
-            normalized_sentinel2, 
+        # Step 3: Detect mining areas (without the raster arrays, which would
+        # otherwise be pickled back from the worker process only to be dropped)
+        detection_results = await loop.run_in_executor(
+            app.state.process_executor,
+            mining_detector.detect_mining_polygons,
+            normalized_sentinel2,
             temp_dir
         )
         
         if not detection_results or detection_results['polygons'].empty:
             raise Exception("No mining areas detected")
         
-        analysis_results[job_id]["progress"] = 70
-        analysis_results[job_id]["message"] = "Comparing with legal boundaries..."
+        await analysis_store.update(job_id, progress=70, message="Comparing with legal boundaries...")
         
-        # Step 4: Compare with lease boundaries
+        # Step 4: Compare with lease boundaries (file/WFS I/O runs in a worker thread)
         if request.lease_file_path and os.path.exists(request.lease_file_path):
-            lease_gdf = illegal_detector.read_lease_shapefile(request.lease_file_path)
+            # Only leases near the AOI are read from the file
+            lease_gdf = await asyncio.to_thread(
+                illegal_detector.read_lease_shapefile, request.lease_file_path, _aoi_bounds(aoi_geojson)
+            )
         elif request.fetch_gov_leases:
             # Try fetching from configured government WFS
             # Compute AOI bbox
-            coords = request.aoi_geojson['coordinates'][0]
-            minx = min(c[0] for c in coords)
-            miny = min(c[1] for c in coords)
-            maxx = max(c[0] for c in coords)
-            maxy = max(c[1] for c in coords)
-            lease_gdf = illegal_detector.fetch_government_leases((minx, miny, maxx, maxy))
+            lease_gdf = await asyncio.to_thread(
+                illegal_detector.fetch_government_leases, _aoi_bounds(aoi_geojson)
+            )
             if lease_gdf.empty:
                 raise Exception("Government leases fetch returned no data. Provide a lease file or configure GOV_WFS_URL.")
         else:
             raise Exception("No lease data provided. Upload a lease file or enable fetch_gov_leases.")
         
-        # Compare detected areas with lease boundaries
-        comparison_results = illegal_detector.compare_with_lease(
+        # Compare detected areas with lease boundaries (CPU-bound GEOS overlay)
+        comparison_results = await loop.run_in_executor(
+            app.state.process_executor,
+            compare_with_lease,
             detection_results['polygons'],
             lease_gdf,
             request.buffer_meters
         )
         
-        analysis_results[job_id]["progress"] = 90
-        analysis_results[job_id]["message"] = "Generating results..."
+        await analysis_store.update(job_id, progress=90, message="Generating results...")
         
-        # Step 5: Generate summary statistics
-        summary_stats = illegal_detector.generate_summary_statistics(comparison_results)
-        
-        # Export results
-        export_files = illegal_detector.export_results(
-            comparison_results,
-            temp_dir,
-            'all'
+        # Step 5: Generate summary statistics, records and exports concurrently,
+        # all off the event loop (the frame is only read from here on)
+        summary_stats, comparison_records, export_files = await asyncio.gather(
+            asyncio.to_thread(illegal_detector.generate_summary_statistics, comparison_results),
+            asyncio.to_thread(comparison_results.to_dict, 'records'),
+            asyncio.to_thread(
+                illegal_detector.export_results,
+                comparison_results,
+                temp_dir,
+                'all'
+            )
         )
         
         # Update final results
-        analysis_results[job_id].update({
-            "status": "completed",
-            "message": "Illegal mining detection analysis completed successfully.",
-            "timestamp": datetime.now().isoformat(),
-            "progress": 100,
-            "results": {
-                "detection_results": detection_results,
-                "comparison_results": comparison_results.to_dict('records') if not comparison_results.empty else [],
+        await analysis_store.update(
+            job_id,
+            status="completed",
+            message="Illegal mining detection analysis completed successfully.",
+            timestamp=datetime.now().isoformat(),
+            progress=100,
+            results={
+                "detection_results": _detection_summary(detection_results),
+                "comparison_results": comparison_records,
                 "summary_statistics": summary_stats,
                 "export_files": export_files,
                 "temp_directory": temp_dir
             }
-        })
+        )
         
         logger.info(f"✅ Illegal mining analysis completed: {job_id}")
         
     except Exception as e:
         logger.error(f"❌ Error in illegal mining analysis: {e}")
-        analysis_results[job_id].update({
-            "status": "failed",
-            "message": f"Analysis failed: {str(e)}",
-            "timestamp": datetime.now().isoformat(),
-            "error": str(e)
-        })
+        await analysis_store.update(
+            job_id,
+            status="failed",
+            message=f"Analysis failed: {str(e)}",
+            timestamp=datetime.now().isoformat(),
+            error=str(e)
+        )
+
+def _ring_area_m2(ring: Any) -> float:
+    """Geodesic area (m²) enclosed by a lon/lat ring, from its raw coordinate arrays"""
+    coords = np.asarray(ring.coords)
+    return abs(_GEOD.polygon_area_perimeter(coords[:, 0], coords[:, 1])[0])
+
+def _analysis_cache_key(request_fields: Dict[str, Any]) -> str:
+    """Fingerprint of everything that determines an analysis' output"""
+    lease_file_path = request_fields.get("lease_file_path")
+    lease_mtime = None
+    if lease_file_path and os.path.exists(lease_file_path):
+        # A re-uploaded lease file at the same path must not hit the old entry
+        lease_mtime = os.path.getmtime(lease_file_path)
+    return hashlib.blake2b(orjson.dumps(
+        {**request_fields, "lease_mtime": lease_mtime},
+        option=orjson.OPT_SORT_KEYS
+    ), digest_size=16).hexdigest()
+
+def _copy_upload(source: Any, file_path: str) -> None:
+    """Copy an upload's file object to disk without holding it in memory"""
+    source.seek(0)
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer, UPLOAD_CHUNK_SIZE)
+
+def _safe_upload_name(filename: Optional[str]) -> str:
+    """Strip directory components from a client-supplied filename so uploads stay in their temp dir"""
+    name = os.path.basename((filename or '').replace('\\', '/'))
+    if name in ('', '.', '..'):
+        raise HTTPException(status_code=400, detail="Invalid upload filename")
+    return name
+
+def _make_scratch_dir() -> str:
+    """Create a per-analysis scratch directory, preferring ANALYSIS_SCRATCH when it has room"""
+    try:
+        os.makedirs(ANALYSIS_SCRATCH, exist_ok=True)
+        if shutil.disk_usage(ANALYSIS_SCRATCH).free >= ANALYSIS_SCRATCH_MIN_FREE_BYTES:
+            return tempfile.mkdtemp(dir=ANALYSIS_SCRATCH)
+        logger.warning(f"⚠️ Scratch {ANALYSIS_SCRATCH} is low on space; using default temp dir")
+    except OSError as e:
+        logger.warning(f"⚠️ Scratch {ANALYSIS_SCRATCH} unavailable ({e}); using default temp dir")
+    return tempfile.mkdtemp()
+
+def _geodesic_area_ha(gdf: Any) -> float:
+    """Total geodesic area (ha) of a GeoDataFrame's geometries on the WGS84 ellipsoid"""
+    geoms = gdf.geometry
+    if gdf.crs is not None and not gdf.crs.is_geographic:
+        geoms = geoms.to_crs('EPSG:4326')
+    # Explode multi-part geometries, then one pyproj call per ring
+    polygons = shapely.get_parts(np.asarray(geoms.dropna()))
+    total_m2 = 0.0
+    for poly in polygons:
+        if poly.geom_type != 'Polygon' or poly.is_empty:
+            continue
+        total_m2 += _ring_area_m2(poly.exterior)
+        for interior in poly.interiors:
+            total_m2 -= _ring_area_m2(interior)
+    return total_m2 / 10000
+
+def _detection_summary(detection_results: Dict) -> Dict:
+    """
+    The part of a detection run worth storing with the job
+    
+    Leaves out the full-scene mask and index rasters and the polygon frame
+    (every polygon is already in the comparison results), which would
+    otherwise be written to the job store and sent in every /api/results body.
+    """
+    return {
+        'summary': detection_results.get('summary'),
+        'statistics': (detection_results.get('detection_results') or {}).get('statistics'),
+        'polygons_path': detection_results.get('polygons_path'),
+        'mask_path': detection_results.get('mask_path')
+    }
+
+def _aoi_bounds(aoi_geojson: Dict) -> tuple:
+    """Bounding box (minx, miny, maxx, maxy) of an AOI polygon's exterior ring"""
+    coords = np.asarray(aoi_geojson['coordinates'][0], dtype=np.float64)
+    mn = coords.min(axis=0)
+    mx = coords.max(axis=0)
+    return float(mn[0]), float(mn[1]), float(mx[0]), float(mx[1])
 
 def _create_sample_lease_boundaries(aoi_geojson: Dict) -> Any:
     """Create sample lease boundaries for demo purposes"""
-    import geopandas as gpd
-    from shapely.geometry import Polygon
-    
     # Extract AOI bounds
-    coords = aoi_geojson['coordinates'][0]
-    min_lon = min(coord[0] for coord in coords)
-    max_lon = max(coord[0] for coord in coords)
-    min_lat = min(coord[1] for coord in coords)
-    max_lat = max(coord[1] for coord in coords)
+    min_lon, min_lat, max_lon, max_lat = _aoi_bounds(aoi_geojson)
     
     # Create sample lease boundaries
     width = max_lon - min_lon
@@ -648,7 +1111,7 @@ def _create_sample_lease_boundaries(aoi_geojson: Dict) -> Any:
     return gpd.GeoDataFrame(sample_leases, crs='EPSG:4326')
 
 @app.get("/api/results/{job_id}")
-async def get_results(job_id: str):
+async def get_results(job_id: str, request: Request):
     """
     Get analysis results for a job
     
@@ -658,152 +1121,194 @@ async def get_results(job_id: str):
     Returns:
         Dict: Analysis results
     """
-    if job_id not in analysis_results:
-        raise HTTPException(status_code=404, detail="Job not found")
+    cached = await _cached_job_body(_completed_results_json, job_id)
+    if cached is not None:
+        return _cached_json_response(request, *cached)
     
-    result = analysis_results[job_id]
+    result = await analysis_store.get(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job not found")
     
-    # Return appropriate response based on status
+    # Return appropriate response based on status; encoded directly with orjson
+    # so large result dicts skip the jsonable_encoder walk
     if result["status"] == "completed":
-        return {
+        # Completed results never change, so encode them once for every later poll
+        body = dumps_payload({
             "job_id": job_id,
             "status": "completed",
             "message": "Analysis completed successfully",
             "timestamp": result["timestamp"],
             "results": result["results"]
-        }
+        })
+        etag = _bytes_etag(body)
+        _completed_results_json[job_id] = (body, etag)
+        while len(_completed_results_json) > RESULTS_CACHE_SIZE:
+            _completed_results_json.popitem(last=False)
+        return _cached_json_response(request, body, etag)
     elif result["status"] == "failed":
-        return {
+        return _json_bytes_response({
             "job_id": job_id,
             "status": "failed",
             "message": result["message"],
             "timestamp": result["timestamp"],
             "error": result.get("error", "Unknown error")
-        }
+        })
     else:
-        return {
+        return _json_bytes_response({
             "job_id": job_id,
             "status": result["status"],
             "message": result["message"],
             "timestamp": result["timestamp"],
             "progress": result.get("progress", 0)
-        }
+        })
 
-@app.get("/api/report/{job_id}")
-async def get_report(job_id: str):
+@app.get("/api/results/{job_id}/events")
+async def stream_progress(job_id: str):
     """
-    Generate and download PDF report for a job
+    Stream job progress as Server-Sent Events until the job finishes
+    
+    Each event carries the job's status, progress and message; the final
+    event has status "completed" or "failed", after which the full results
+    are fetched once from /api/results/{job_id} instead of polling it.
     
     Args:
         job_id: Job ID
         
     Returns:
-        FileResponse: PDF report
+        StreamingResponse: text/event-stream of progress updates
     """
-    if job_id not in analysis_results:
+    job = await analysis_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    result = analysis_results[job_id]
+    async def events(job):
+        last = None
+        while True:
+            if job is None:
+                yield b"event: error\ndata: {\"detail\":\"Job not found\"}\n\n"
+                return
+            update = {
+                "job_id": job_id,
+                "status": job["status"],
+                "progress": job.get("progress", 0),
+                "message": job.get("message")
+            }
+            # Only send changes; SSE comments keep idle proxies from closing the stream
+            if update != last:
+                yield b"data: " + orjson.dumps(update) + b"\n\n"
+                last = update
+            else:
+                yield b": keep-alive\n\n"
+            if job["status"] in ("completed", "failed"):
+                return
+            await asyncio.sleep(PROGRESS_POLL_SECONDS)
+            job = await analysis_store.get(job_id)
     
-    if result["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Analysis not completed yet")
+    return StreamingResponse(
+        events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/report/{job_id}")
+async def get_report(job_id: str, request: Request):
+    """
+    Download the plain-text analysis report for a job
+    
+    Args:
+        job_id: Job ID
+        
+    Returns:
+        Response: Text report attachment
+    """
+    cached = await _cached_job_body(_report_bodies, job_id)
+    if cached is None:
+        result = await analysis_store.get(job_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        if result["status"] != "completed":
+            raise HTTPException(status_code=400, detail="Analysis not completed yet")
     
     try:
-        # Generate PDF report (placeholder for now)
-        report_path = os.path.join(result["results"]["temp_directory"], "illegal_mining_report.pdf")
-        
-        # Create a simple text report for now
-        with open(report_path.replace('.pdf', '.txt'), 'w') as f:
-            f.write("ILLEGAL MINING DETECTION REPORT\n")
-            f.write("=" * 40 + "\n\n")
-            f.write(f"Job ID: {job_id}\n")
-            f.write(f"Generated: {result['timestamp']}\n\n")
-            
-            summary = result["results"]["summary_statistics"]
-            f.write("SUMMARY STATISTICS\n")
-            f.write("-" * 20 + "\n")
-            f.write(f"Total detected areas: {summary['total_detected_areas']}\n")
-            f.write(f"Legal areas: {summary['legal_areas']}\n")
-            f.write(f"Illegal areas: {summary['illegal_areas']}\n")
-            f.write(f"Mixed areas: {summary['mixed_areas']}\n")
-            f.write(f"Total detected area: {summary['total_detected_area_ha']} hectares\n")
-            f.write(f"Legal area: {summary['legal_area_ha']} hectares\n")
-            f.write(f"Illegal area: {summary['illegal_area_ha']} hectares\n")
-            f.write(f"Compliance rate: {summary['compliance_rate_percent']}%\n")
-            f.write(f"Violation rate: {summary['violation_rate_percent']}%\n")
+        if cached is None:
+            # Plain-text report rendered once per job and served from memory
+            report_bytes = _REPORT_TEMPLATE.render(
+                job_id=job_id,
+                timestamp=result['timestamp'],
+                summary=result["results"]["summary_statistics"]
+            ).encode()
+            cached = (report_bytes, _bytes_etag(report_bytes))
+            _report_bodies[job_id] = cached
+            while len(_report_bodies) > RESULTS_CACHE_SIZE:
+                _report_bodies.popitem(last=False)
         
-        return FileResponse(
-            report_path.replace('.pdf', '.txt'),
-            media_type='text/plain',
-            filename=f"illegal_mining_report_{job_id}.txt"
-        )
+        report_bytes, etag = cached
+        headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        headers["Content-Disposition"] = f'attachment; filename="illegal_mining_report_{job_id}.txt"'
+        return Response(content=report_bytes, media_type='text/plain', headers=headers)
         
     except Exception as e:
         logger.error(f"❌ Error generating report: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/download/{job_id}/{file_type}")
-async def download_file(job_id: str, file_type: str):
+async def download_file(job_id: str, file_type: ExportFileType, request: Request):
     """
     Download analysis files
     
     Args:
         job_id: Job ID
-        file_type: Type of file to download (geojson, shapefile, csv)
+        file_type: Type of file to download (geojson, shapefile, csv, summary)
         
     Returns:
         FileResponse: Requested file
     """
-    if job_id not in analysis_results:
+    result = await analysis_store.get(job_id)
+    if result is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    result = analysis_results[job_id]
-    
     if result["status"] != "completed":
         raise HTTPException(status_code=400, detail="Analysis not completed yet")
     
     try:
-        export_files = result["results"]["export_files"]
-        
-        if file_type not in export_files:
+        file_path = result["results"]["export_files"].get(file_type)
+        if file_path is None:
             raise HTTPException(status_code=404, detail=f"File type {file_type} not found")
         
-        file_path = export_files[file_type]
-        
-        if not os.path.exists(file_path):
+        # One stat off the event loop both checks existence and feeds FileResponse
+        try:
+            stat_result = await asyncio.to_thread(os.stat, file_path)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="File not found")
         
-        media_type = {
-            'geojson': 'application/geo+json',
-            'shapefile': 'application/zip',
-            'csv': 'text/csv',
-            'summary': 'application/json'
-        }.get(file_type, 'application/octet-stream')
+        headers = {"ETag": _file_etag(stat_result), "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        if _etag_matches(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
         
         return FileResponse(
             file_path,
-            media_type=media_type,
-            filename=os.path.basename(file_path)
+            media_type=EXPORT_MEDIA_TYPES[file_type],
+            filename=os.path.basename(file_path),
+            headers=headers,
+            stat_result=stat_result
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error downloading file: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/jobs")
-async def list_jobs():
+async def list_jobs(request: Request):
     """List all analysis jobs"""
-    return {
-        "jobs": [
-            {
-                "job_id": job_id,
-                "status": result["status"],
-                "timestamp": result["timestamp"],
-                "progress": result.get("progress", 0)
-            }
-            for job_id, result in analysis_results.items()
-        ]
-    }
+    # Encoded directly; the listing grows with the store and needs no jsonable_encoder pass.
+    # Dashboards revalidate with If-None-Match and get a bodiless 304 while nothing changed
+    body = dumps_payload({"jobs": await analysis_store.summaries()})
+    return _cached_json_response(request, body, _bytes_etag(body), REVALIDATE_CACHE_CONTROL)
 
 if __name__ == "__main__":
     import uvicorn
@@ -811,6 +1316,10 @@ if __name__ == "__main__":
         "app:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        # Reload spawns a file-watcher supervisor; opt in for development only
+        reload=os.getenv('API_RELOAD', '0') == '1',
+        workers=API_WORKERS,
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
\ No newline at end of file
@@ -5,22 +5,155 @@ Proper spatial overlay analysis to identify illegal mining activities
 
 import geopandas as gpd
 import numpy as np
+import pandas as pd
+import shapely
 import logging
 from typing import Dict, List, Optional, Tuple, Union
 from shapely.geometry import Polygon, MultiPolygon, Point
 from shapely.ops import unary_union
+from shapely.strtree import STRtree
 import json
 import os
-from pyproj import CRS
+import hashlib
+import tempfile
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pyproj import CRS, Geod, Transformer
 import fiona
+import pyogrio
 import requests
+from requests.adapters import HTTPAdapter
 
 GOV_WFS_URL = os.getenv('GOV_WFS_URL', '').strip() or ''
+# Government lease layers change rarely; reuse a bbox's response for this long
+GOV_WFS_CACHE_TTL_SECONDS = float(os.getenv('GOV_WFS_CACHE_TTL_SECONDS', '300'))
+GOV_WFS_CACHE_SIZE = int(os.getenv('GOV_WFS_CACHE_SIZE', '32'))
+
+# World cylindrical equal-area projection (metres) for overlay areas; Web
+# Mercator (EPSG:3857) would inflate areas by ~1.15x at Indian latitudes
+EQUAL_AREA_CRS = 'EPSG:6933'
+
+# WGS84 ellipsoid for geodesic areas of lon/lat geometries
+_GEOD = Geod(ellps='WGS84')
+
+# Leases per partial union when merging large lease sets
+LEASE_UNION_CHUNK_SIZE = int(os.getenv('LEASE_UNION_CHUNK_SIZE', '500'))
+
+# GEOS releases the GIL, so large overlays are split across threads; each
+# analysis already runs in its own pool process, hence the small default
+OVERLAY_THREADS = int(os.getenv('OVERLAY_THREADS', str(min(4, os.cpu_count() or 1))))
+# Below this many geometries one call beats the thread hand-off
+OVERLAY_PARALLEL_MIN = 256
+
+# Lease unions/indexes kept per worker process for repeated comparisons
+LEASE_INDEX_CACHE_SIZE = int(os.getenv('LEASE_INDEX_CACHE_SIZE', '4'))
+
+# Rows per chunk when writing the CSV export
+CSV_EXPORT_CHUNK_SIZE = 100_000
+
+# WFS responses are spooled to disk in chunks of this size rather than decoded in memory
+WFS_CHUNK_SIZE = 1 << 20
+
+# Shared keep-alive session for WFS requests (fetches run in worker threads)
+_wfs_session = requests.Session()
+_wfs_session.mount('https://', HTTPAdapter(pool_maxsize=16))
+_wfs_session.mount('http://', HTTPAdapter(pool_maxsize=16))
+
+# Common lease column name mappings (standard name -> accepted source names)
+LEASE_COLUMN_ALIASES = {
+    'lease_id': ('lease_id', 'id', 'lease_no', 'lease_number', 'ML_NO'),
+    'lease_name': ('lease_name', 'name', 'mine_name', 'lease_title', 'ML_NAME'),
+    'state': ('state', 'state_name', 'STATE', 'STATE_NAME'),
+    'district': ('district', 'district_name', 'DISTRICT', 'DISTRICT_NAME'),
+    'mineral': ('mineral', 'mineral_type', 'MINERAL', 'MINERAL_TYPE'),
+    'area_hectares': ('area_hectares', 'area_ha', 'area', 'AREA_HA', 'AREA'),
+    'valid_from': ('valid_from', 'from_date', 'start_date', 'VALID_FROM'),
+    'valid_to': ('valid_to', 'to_date', 'end_date', 'VALID_TO')
+}
+
+# Attribute columns read from lease files; everything else is never materialized
+LEASE_READ_COLUMNS = sorted({name for names in LEASE_COLUMN_ALIASES.values() for name in names})
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _to_crs(gdf, crs: str):
+    """Reproject only when the CRS actually differs; pre-projected data is returned as a shallow copy with no pyproj pass"""
+    if gdf.crs is not None and gdf.crs == CRS.from_user_input(crs):
+        return gdf.copy(deep=False)
+    return gdf.to_crs(crs)
+
+def _area_hectares(geoms: gpd.GeoSeries) -> np.ndarray:
+    """Area (ha) of each geometry: geodesic on the WGS84 ellipsoid for lon/lat data, else planar in EQUAL_AREA_CRS"""
+    if geoms.crs is None or geoms.crs.is_geographic:
+        # No reprojection at all; GeoJSON without a CRS is lon/lat by definition
+        return np.array([
+            abs(_GEOD.geometry_area_perimeter(geom)[0]) if geom is not None else np.nan
+            for geom in geoms.values
+        ]) / 10000
+    return _to_crs(geoms, EQUAL_AREA_CRS).area.to_numpy() / 10000
+
+def _repair_geometries(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Drop missing/empty geometries and repair invalid ones in bulk with GEOS MakeValid instead of discarding them"""
+    geoms = np.asarray(gdf.geometry)
+    gdf = gdf[~(shapely.is_missing(geoms) | shapely.is_empty(geoms))]
+    geoms = np.array(gdf.geometry, dtype=object)
+    invalid = ~shapely.is_valid(geoms)
+    if not invalid.any():
+        return gdf
+    logger.warning(f"⚠️ Repairing {int(invalid.sum())} invalid geometries")
+    geoms[invalid] = shapely.make_valid(geoms[invalid])
+    return gdf.set_geometry(gpd.GeoSeries(geoms, index=gdf.index, crs=gdf.crs))
+
+# Threads are only started on first use, i.e. inside the worker process
+_overlay_pool = ThreadPoolExecutor(max_workers=OVERLAY_THREADS, thread_name_prefix='overlay')
+
+def _overlay_area(op, geoms: np.ndarray, other) -> np.ndarray:
+    """Area of op(geoms, other) element-wise (other: aligned array or one geometry), in thread-parallel slices when large"""
+    if OVERLAY_THREADS <= 1 or len(geoms) < OVERLAY_PARALLEL_MIN:
+        return shapely.area(op(geoms, other))
+    bounds = np.linspace(0, len(geoms), OVERLAY_THREADS + 1, dtype=int)
+    aligned = isinstance(other, np.ndarray)
+    parts = _overlay_pool.map(
+        lambda lo, hi: shapely.area(op(geoms[lo:hi], other[lo:hi] if aligned else other)),
+        bounds[:-1], bounds[1:]
+    )
+    return np.concatenate(list(parts))
+
+# Lease-set fingerprint -> projected leases, buffered union and STRtree
+_lease_index_cache: "OrderedDict[str, Dict]" = OrderedDict()
+_lease_index_cache_lock = threading.Lock()
+
+def _lease_fingerprint(lease_polygons: gpd.GeoDataFrame, buffer_meters: float, equal_area_crs: str) -> str:
+    """Content hash of a lease set (geometries, CRS, ids/names) and the comparison settings"""
+    digest = hashlib.blake2b(repr((str(lease_polygons.crs), buffer_meters, equal_area_crs)).encode(), digest_size=16)
+    digest.update(b''.join(wkb or b'' for wkb in shapely.to_wkb(np.asarray(lease_polygons.geometry))))
+    for col in ('lease_id', 'lease_name'):
+        if col in lease_polygons.columns:
+            digest.update(col.encode())
+            digest.update(pd.util.hash_pandas_object(lease_polygons[col], index=False).values.tobytes())
+    return digest.hexdigest()
+
+def _cascaded_union(geoms: np.ndarray, chunk_size: int = LEASE_UNION_CHUNK_SIZE):
+    """Union geometries chunk by chunk, then merge the partial unions (much faster than one call for big sets)"""
+    if len(geoms) <= chunk_size:
+        return shapely.union_all(geoms)
+    parts = [shapely.union_all(geoms[i:i + chunk_size]) for i in range(0, len(geoms), chunk_size)]
+    return shapely.union_all(parts)
+
+def _round_values(values: np.ndarray, decimals: int) -> np.ndarray:
+    """Python's round() on each value: np.round scales first, so e.g. 0.765 would come out as 0.76, not 0.77"""
+    return np.array([round(value, decimals) for value in values.tolist()], dtype=np.float64)
+
+def _fast_rect_contains(lease_bounds: np.ndarray, det_bounds: np.ndarray) -> np.ndarray:
+    """Whether each lease envelope (N x 4 minx, miny, maxx, maxy) contains its detection envelope (4 or N x 4)"""
+    minx, miny, maxx, maxy = np.asarray(det_bounds).T
+    return ((lease_bounds[:, 0] <= minx) & (lease_bounds[:, 1] <= miny) &
+            (lease_bounds[:, 2] >= maxx) & (lease_bounds[:, 3] >= maxy))
+
 class IllegalMiningDetector:
     """Detect illegal mining by comparing with legal lease boundaries"""
     
@@ -34,14 +167,26 @@ class IllegalMiningDetector:
         self.buffer_meters = buffer_meters
         self.tolerance_ha = 0.01  # 0.01 hectares tolerance for small spillovers
         
+        # bbox -> (fetched_at, leases) for government WFS responses, plus one
+        # lock per bbox so concurrent misses make a single upstream request
+        self._wfs_cache: "OrderedDict[Optional[Tuple[float, ...]], Tuple[float, gpd.GeoDataFrame]]" = OrderedDict()
+        self._wfs_cache_lock = threading.Lock()
+        self._wfs_fetch_locks: Dict[Optional[Tuple[float, ...]], threading.Lock] = {}
+        
         logger.info(f"Illegal mining detector initialized (buffer: {buffer_meters}m)")
     
-    def read_lease_shapefile(self, path: str) -> gpd.GeoDataFrame:
+    def read_lease_shapefile(self, path: str,
+                             aoi_bbox: Optional[Tuple[float, float, float, float]] = None) -> gpd.GeoDataFrame:
         """
         Read lease boundaries from various formats
         
+        Reads through pyogrio, and only the geometry plus the attribute
+        columns in LEASE_COLUMN_ALIASES; with an AOI bbox, only leases whose
+        envelope touches it are read.
+        
         Args:
-            path: Path to shapefile, KML, or GeoJSON
+            path: Path to shapefile, KML, GeoJSON or zipped shapefile
+            aoi_bbox: Optional (minx, miny, maxx, maxy) in EPSG:4326
             
         Returns:
             gpd.GeoDataFrame: Lease boundaries
@@ -49,23 +194,14 @@ class IllegalMiningDetector:
         try:
             logger.info(f"📁 Reading lease boundaries from {path}")
             
-            # Determine file format
-            if path.endswith('.geojson'):
-                gdf = gpd.read_file(path)
-            elif path.endswith('.kml'):
-                # Handle KML files
-                gdf = gpd.read_file(path, driver='KML')
-            elif path.endswith('.shp'):
-                gdf = gpd.read_file(path)
-            elif path.endswith('.zip'):
-                # Handle zipped shapefiles
-                gdf = gpd.read_file(f"zip://{path}")
-            else:
-                # Try to read with fiona
-                gdf = gpd.read_file(path)
+            # GDAL picks the driver from the file itself; zipped shapefiles
+            # are read through its zip virtual filesystem
+            source = f"zip://{path}" if path.endswith('.zip') else path
+            bbox = self._bbox_in_source_crs(source, aoi_bbox) if aoi_bbox is not None else None
+            gdf = gpd.read_file(source, engine='pyogrio', columns=LEASE_READ_COLUMNS, bbox=bbox)
             
             # Ensure valid geometries
-            gdf = gdf[gdf.geometry.is_valid]
+            gdf = _repair_geometries(gdf)
             
             # Standardize column names
             gdf = self._standardize_lease_columns(gdf)
@@ -77,55 +213,97 @@ class IllegalMiningDetector:
             logger.error(f"❌ Error reading lease file: {e}")
             return gpd.GeoDataFrame()
 
+    def _bbox_in_source_crs(self, source: str,
+                            aoi_bbox: Tuple[float, float, float, float]) -> Tuple[float, float, float, float]:
+        """Express an EPSG:4326 bbox in a lease file's own CRS, as pyogrio's bbox filter expects"""
+        source_crs = pyogrio.read_info(source)['crs']
+        if source_crs is None or CRS.from_user_input(source_crs) == CRS.from_epsg(4326):
+            return tuple(aoi_bbox)
+        transformer = Transformer.from_crs('EPSG:4326', source_crs, always_xy=True)
+        return transformer.transform_bounds(*aoi_bbox)
+    
     def fetch_government_leases(self, aoi_bbox: Tuple[float, float, float, float] = None) -> gpd.GeoDataFrame:
         """Fetch legal mining leases from a live government WFS if configured.
         Expects GOV_WFS_URL env var pointing to a WFS GetFeature endpoint returning GeoJSON.
-        Optionally filter by bbox if service supports it.
+        Optionally filter by bbox if service supports it. Responses are cached
+        per bbox for GOV_WFS_CACHE_TTL_SECONDS; failed fetches are not cached.
         """
         try:
             if not GOV_WFS_URL:
                 logger.warning("⚠️ GOV_WFS_URL not set; cannot fetch government leases")
                 return gpd.GeoDataFrame()
-            params = {}
-            if aoi_bbox is not None:
-                # Many WFS servers support bbox param as minx,miny,maxx,maxy
-                params['bbox'] = ','.join(map(str, aoi_bbox))
-            resp = requests.get(GOV_WFS_URL, params=params, timeout=60)
-            resp.raise_for_status()
-            gdf = gpd.read_file(resp.text)
-            if gdf.empty:
-                logger.warning("⚠️ Government WFS returned no leases")
-                return gpd.GeoDataFrame()
-            gdf = gdf[gdf.geometry.notnull()]
-            gdf = gdf[gdf.geometry.is_valid]
-            gdf = self._standardize_lease_columns(gdf)
-            logger.info(f"✅ Fetched {len(gdf)} government leases from WFS")
-            return gdf
+            key = tuple(map(float, aoi_bbox)) if aoi_bbox is not None else None
+            gdf = self._cached_government_leases(key)
+            if gdf is None:
+                with self._wfs_cache_lock:
+                    fetch_lock = self._wfs_fetch_locks.setdefault(key, threading.Lock())
+                with fetch_lock:
+                    # Another thread may have filled the entry while we waited
+                    gdf = self._cached_government_leases(key)
+                    if gdf is None:
+                        gdf = self._request_government_leases(aoi_bbox)
+                        with self._wfs_cache_lock:
+                            self._wfs_cache[key] = (time.monotonic(), gdf)
+                            while len(self._wfs_cache) > GOV_WFS_CACHE_SIZE:
+                                old_key, _ = self._wfs_cache.popitem(last=False)
+                                self._wfs_fetch_locks.pop(old_key, None)
+            # Callers get their own copy so they cannot mutate the cached frame
+            return gdf.copy()
         except Exception as e:
             logger.error(f"❌ Error fetching government leases: {e}")
             return gpd.GeoDataFrame()
     
+    def _cached_government_leases(self, key: Optional[Tuple[float, ...]]) -> Optional[gpd.GeoDataFrame]:
+        """Unexpired cached WFS response for a bbox, if any"""
+        with self._wfs_cache_lock:
+            entry = self._wfs_cache.get(key)
+            if entry is None:
+                return None
+            fetched_at, gdf = entry
+            if time.monotonic() - fetched_at > GOV_WFS_CACHE_TTL_SECONDS:
+                del self._wfs_cache[key]
+                return None
+            self._wfs_cache.move_to_end(key)
+            return gdf
+    
+    def _request_government_leases(self, aoi_bbox: Optional[Tuple[float, float, float, float]]) -> gpd.GeoDataFrame:
+        """Request and standardize leases from the government WFS (raises on failure)"""
+        params = {}
+        if aoi_bbox is not None:
+            # Many WFS servers support bbox param as minx,miny,maxx,maxy
+            params['bbox'] = ','.join(map(str, aoi_bbox))
+        # Stream the body to a temp file and let GDAL parse it from there, so
+        # the payload is never held as bytes plus a decoded str plus parsed JSON
+        with _wfs_session.get(GOV_WFS_URL, params=params, timeout=60, stream=True) as resp:
+            resp.raise_for_status()
+            with tempfile.NamedTemporaryFile(suffix='.geojson') as spool:
+                for chunk in resp.iter_content(WFS_CHUNK_SIZE):
+                    spool.write(chunk)
+                spool.flush()
+                gdf = gpd.read_file(spool.name, engine='pyogrio', columns=LEASE_READ_COLUMNS)
+        if gdf.empty:
+            logger.warning("⚠️ Government WFS returned no leases")
+            return gpd.GeoDataFrame()
+        gdf = _repair_geometries(gdf)
+        gdf = self._standardize_lease_columns(gdf)
+        logger.info(f"✅ Fetched {len(gdf)} government leases from WFS")
+        return gdf
+    
     def _standardize_lease_columns(self, gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
         """Standardize column names in lease GeoDataFrame"""
         
-        # Common column name mappings
-        column_mappings = {
-            'lease_id': ['lease_id', 'id', 'lease_no', 'lease_number', 'ML_NO'],
-            'lease_name': ['lease_name', 'name', 'mine_name', 'lease_title', 'ML_NAME'],
-            'state': ['state', 'state_name', 'STATE', 'STATE_NAME'],
-            'district': ['district', 'district_name', 'DISTRICT', 'DISTRICT_NAME'],
-            'mineral': ['mineral', 'mineral_type', 'MINERAL', 'MINERAL_TYPE'],
-            'area_hectares': ['area_hectares', 'area_ha', 'area', 'AREA_HA', 'AREA'],
-            'valid_from': ['valid_from', 'from_date', 'start_date', 'VALID_FROM'],
-            'valid_to': ['valid_to', 'to_date', 'end_date', 'VALID_TO']
-        }
-        
-        # Rename columns
-        for standard_name, possible_names in column_mappings.items():
+        # Rename columns (first matching alias wins), with a single frame copy
+        columns = set(gdf.columns)
+        renames = {}
+        for standard_name, possible_names in LEASE_COLUMN_ALIASES.items():
+            if standard_name in columns:
+                continue
             for possible_name in possible_names:
-                if possible_name in gdf.columns and standard_name not in gdf.columns:
-                    gdf = gdf.rename(columns={possible_name: standard_name})
+                if possible_name in columns and possible_name not in renames:
+                    renames[possible_name] = standard_name
                     break
+        if renames:
+            gdf = gdf.rename(columns=renames)
         
         # Add missing columns with default values
         if 'lease_id' not in gdf.columns:
@@ -140,7 +318,7 @@ class IllegalMiningDetector:
             gdf['mineral'] = 'Unknown'
         if 'area_hectares' not in gdf.columns:
             # Calculate area if not provided
-            gdf['area_hectares'] = gdf.geometry.to_crs('EPSG:3857').area / 10000
+            gdf['area_hectares'] = _area_hectares(gdf.geometry)
         if 'valid_from' not in gdf.columns:
             gdf['valid_from'] = '2020-01-01'
         if 'valid_to' not in gdf.columns:
@@ -150,7 +328,7 @@ class IllegalMiningDetector:
     
     def compare_with_lease(self, detected_polygons: gpd.GeoDataFrame, 
                           lease_polygons: gpd.GeoDataFrame,
-                          equal_area_crs: str = "EPSG:3857") -> gpd.GeoDataFrame:
+                          equal_area_crs: str = EQUAL_AREA_CRS) -> gpd.GeoDataFrame:
         """
         Compare detected mining polygons with legal lease boundaries
         
@@ -169,42 +347,74 @@ class IllegalMiningDetector:
                 logger.warning("⚠️ Empty input data")
                 return gpd.GeoDataFrame()
             
-            # Ensure both GeoDataFrames are in the same CRS
-            if detected_polygons.crs != lease_polygons.crs:
-                lease_polygons = lease_polygons.to_crs(detected_polygons.crs)
-            
             # Project to equal area CRS for accurate area calculations
-            detected_ea = detected_polygons.to_crs(equal_area_crs)
-            lease_ea = lease_polygons.to_crs(equal_area_crs)
+            detected_ea = _to_crs(detected_polygons, equal_area_crs)
+            lease_index = self._lease_index(lease_polygons, equal_area_crs)
+            lease_ea = lease_index['leases']
+            lease_union_buffered = lease_index['union']
+            
+            # Missing or invalid detections cannot be overlaid; they are left out
+            # of every GEOS call below and reported with status 'error'
+            geoms = np.asarray(detected_ea.geometry)
+            valid = shapely.is_valid(geoms)
+            total_area_m2 = shapely.area(geoms)
+            
+            # Every intersecting (detection, lease) pair from one bulk tree query
+            covered, overlapping_leases = self._lease_overlaps(
+                np.where(valid, geoms, None), total_area_m2, lease_ea, lease_index
+            )
             
-            # Create union of all lease boundaries
-            lease_union = lease_ea.unary_union
+            # Area inside/outside the lease union for all detections at once
+            inside_area_m2, outside_area_m2 = self._union_overlay(
+                geoms, valid, total_area_m2, covered, lease_union_buffered
+            )
             
-            # Add buffer to lease boundaries for tolerance
-            if self.buffer_meters > 0:
-                lease_union_buffered = lease_union.buffer(self.buffer_meters)
-            else:
-                lease_union_buffered = lease_union
+            # Overlap percentage, status and confidence for all detections at once
+            total_area_ha = total_area_m2 / 10000
+            inside_area_ha = inside_area_m2 / 10000
+            outside_area_ha = outside_area_m2 / 10000
+            overlap_percentage = np.zeros(len(geoms))
+            np.divide(inside_area_ha, total_area_ha, out=overlap_percentage, where=total_area_ha > 0)
+            overlap_percentage *= 100
+            num_overlapping_leases = np.fromiter(map(len, overlapping_leases), dtype=np.int64, count=len(geoms))
             
-            # Analyze each detected polygon
-            results = []
+            status = self._classify_mining_status(outside_area_ha, overlap_percentage)
+            status[~(np.isfinite(inside_area_m2) & np.isfinite(outside_area_m2))] = 'error'
+            confidence = self._calculate_confidence_score(
+                total_area_ha, overlap_percentage, num_overlapping_leases
+            )
             
-            for idx, detected_poly in detected_ea.iterrows():
-                result = self._analyze_single_polygon(
-                    detected_poly, lease_union_buffered, lease_ea, equal_area_crs
+            # Detections that could not be analyzed report zeros
+            failed = status == 'error'
+            if failed.any():
+                logger.error(f"❌ {int(failed.sum())} detected polygons have missing or invalid geometry")
+            
+            def rounded(values: np.ndarray, decimals: int) -> np.ndarray:
+                return _round_values(np.where(failed, 0.0, values), decimals)
+            
+            # Create results GeoDataFrame column by column on the original
+            # detected geometries, which saves projecting the equal-area copies back
+            results_gdf = gpd.GeoDataFrame({
+                'geometry': detected_polygons.geometry.values,
+                'total_area_ha': rounded(total_area_ha, 2),
+                'inside_area_ha': rounded(inside_area_ha, 2),
+                'outside_area_ha': rounded(outside_area_ha, 2),
+                'overlap_percentage': rounded(overlap_percentage, 1),
+                'status': status,
+                'confidence': rounded(confidence, 2),
+                'overlapping_leases': overlapping_leases,
+                'num_overlapping_leases': num_overlapping_leases,
+                'illegal_area_ha': np.where(
+                    (status == 'illegal') | (status == 'mixed'), rounded(outside_area_ha, 2), 0.0
                 )
-                results.append(result)
-            
-            # Create results GeoDataFrame
-            results_gdf = gpd.GeoDataFrame(results, crs=equal_area_crs)
-            
-            # Convert back to original CRS
-            results_gdf = results_gdf.to_crs(detected_polygons.crs)
+            }, crs=detected_polygons.crs)
             
-            # Add original detected polygon data
-            for col in detected_polygons.columns:
-                if col not in results_gdf.columns:
-                    results_gdf[col] = detected_polygons[col].values
+            # Add original detected polygon data in one block copy
+            extra_cols = detected_polygons.columns[~detected_polygons.columns.isin(results_gdf.columns)]
+            if len(extra_cols):
+                results_gdf = pd.concat(
+                    [results_gdf, detected_polygons[extra_cols].set_axis(results_gdf.index)], axis=1
+                )
             
             logger.info(f"✅ Analysis complete: {len(results_gdf)} areas analyzed")
             return results_gdf
@@ -213,129 +423,183 @@ class IllegalMiningDetector:
             logger.error(f"❌ Error in lease comparison: {e}")
             return gpd.GeoDataFrame()
     
-    def _analyze_single_polygon(self, detected_poly: gpd.GeoSeries, 
-                               lease_union: Union[Polygon, MultiPolygon],
-                               lease_gdf: gpd.GeoDataFrame,
-                               crs: str) -> Dict:
-        """Analyze a single detected polygon against lease boundaries"""
+    def _lease_index(self, lease_polygons: gpd.GeoDataFrame, equal_area_crs: str) -> Dict:
+        """
+        Projected leases, their buffered and prepared union, and an STRtree over them
         
-        try:
-            # Calculate total area
-            total_area_m2 = detected_poly.geometry.area
-            total_area_ha = total_area_m2 / 10000
-            
-            # Find intersection with lease boundaries
-            inside_geom = detected_poly.geometry.intersection(lease_union)
-            inside_area_m2 = inside_geom.area if inside_geom.area > 0 else 0
-            inside_area_ha = inside_area_m2 / 10000
-            
-            # Calculate area outside lease boundaries
-            outside_geom = detected_poly.geometry.difference(lease_union)
-            outside_area_m2 = outside_geom.area if outside_geom.area > 0 else 0
-            outside_area_ha = outside_area_m2 / 10000
-            
-            # Calculate overlap percentage
-            if total_area_ha > 0:
-                overlap_percentage = (inside_area_ha / total_area_ha) * 100
-            else:
-                overlap_percentage = 0
-            
-            # Find overlapping leases
-            overlapping_leases = []
-            for _, lease in lease_gdf.iterrows():
-                if detected_poly.geometry.intersects(lease.geometry):
-                    overlap_area = detected_poly.geometry.intersection(lease.geometry).area / 10000
-                    overlapping_leases.append({
-                        'lease_id': lease.get('lease_id', 'unknown'),
-                        'lease_name': lease.get('lease_name', 'unknown'),
-                        'overlap_area_ha': round(overlap_area, 2)
-                    })
-            
-            # Classify as legal/illegal/mixed
-            status = self._classify_mining_status(outside_area_ha, overlap_percentage)
-            
-            # Calculate confidence score
-            confidence = self._calculate_confidence_score(
-                total_area_ha, overlap_percentage, len(overlapping_leases)
+        Built once per distinct lease set and kept in a small per-process LRU,
+        so repeated comparisons against the same leases skip projection,
+        union, buffer and tree construction.
+        """
+        key = _lease_fingerprint(lease_polygons, self.buffer_meters, equal_area_crs)
+        with _lease_index_cache_lock:
+            lease_index = _lease_index_cache.get(key)
+            if lease_index is not None:
+                _lease_index_cache.move_to_end(key)
+                return lease_index
+        
+        # Leases go to the equal-area CRS straight from their own CRS
+        lease_ea = _to_crs(lease_polygons, equal_area_crs)
+        
+        # Create union of all lease boundaries. With a tolerance buffer, vertex
+        # detail finer than half of it cannot change the buffered result by
+        # more than the buffer itself absorbs, so simplify first to cut the
+        # vertex count every union/overlay call has to walk. Per-lease
+        # geometries stay exact for the per-lease overlap areas.
+        lease_geoms = np.asarray(lease_ea.geometry)
+        if self.buffer_meters > 0:
+            lease_geoms = shapely.simplify(lease_geoms, self.buffer_meters / 2, preserve_topology=True)
+        lease_union = _cascaded_union(lease_geoms)
+        
+        # Add buffer to lease boundaries for tolerance
+        if self.buffer_meters > 0:
+            lease_union_buffered = lease_union.buffer(self.buffer_meters)
+        else:
+            lease_union_buffered = lease_union
+        # Prepared once so every detection's predicate test reuses its GEOS index
+        shapely.prepare(lease_union_buffered)
+        
+        # Spatial index over lease geometries so each detection only
+        # runs exact predicates against leases whose bbox it touches,
+        # plus lease envelopes for the rectangle containment shortcut
+        lease_bounds = lease_ea.geometry.bounds.values
+        envelope_area = (lease_bounds[:, 2] - lease_bounds[:, 0]) * (lease_bounds[:, 3] - lease_bounds[:, 1])
+        lease_index = {
+            'leases': lease_ea,
+            'union': lease_union_buffered,
+            'tree': STRtree(np.asarray(lease_ea.geometry)),
+            'bounds': lease_bounds,
+            'is_rectangle': np.isclose(lease_ea.geometry.area.values, envelope_area, rtol=1e-9)
+        }
+        
+        with _lease_index_cache_lock:
+            _lease_index_cache[key] = lease_index
+            while len(_lease_index_cache) > LEASE_INDEX_CACHE_SIZE:
+                _lease_index_cache.popitem(last=False)
+        return lease_index
+    
+    def _lease_overlaps(self, geoms: np.ndarray, total_area_m2: np.ndarray,
+                        lease_gdf: gpd.GeoDataFrame, lease_index: Dict) -> Tuple[np.ndarray, List[List[Dict]]]:
+        """
+        Find the leases overlapping each detected polygon with one bulk STRtree query
+        
+        Returns:
+            Tuple: per-detection flag for "entirely inside one lease", and
+            per-detection lists of overlapping lease records
+        """
+        det_idx, lease_idx = lease_index['tree'].query(geoms, predicate='intersects')
+        # Group pairs by detection, leases in frame order within each group
+        order = np.lexsort((lease_idx, det_idx))
+        det_idx, lease_idx = det_idx[order], lease_idx[order]
+        
+        # Envelope containment is exact for rectangular leases; others need GEOS
+        lease_geoms = np.asarray(lease_gdf.geometry)
+        pair_covered = _fast_rect_contains(lease_index['bounds'][lease_idx], shapely.bounds(geoms)[det_idx])
+        needs_exact = pair_covered & ~lease_index['is_rectangle'][lease_idx]
+        if needs_exact.any():
+            pair_covered[needs_exact] = shapely.covers(
+                lease_geoms[lease_idx[needs_exact]], geoms[det_idx[needs_exact]]
             )
-            
-            return {
-                'geometry': detected_poly.geometry,
-                'total_area_ha': round(total_area_ha, 2),
-                'inside_area_ha': round(inside_area_ha, 2),
-                'outside_area_ha': round(outside_area_ha, 2),
-                'overlap_percentage': round(overlap_percentage, 1),
-                'status': status,
-                'confidence': round(confidence, 2),
-                'overlapping_leases': overlapping_leases,
-                'num_overlapping_leases': len(overlapping_leases),
-                'illegal_area_ha': round(outside_area_ha, 2) if status in ['illegal', 'mixed'] else 0
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ Error analyzing polygon: {e}")
-            return {
-                'geometry': detected_poly.geometry,
-                'total_area_ha': 0,
-                'inside_area_ha': 0,
-                'outside_area_ha': 0,
-                'overlap_percentage': 0,
-                'status': 'error',
-                'confidence': 0,
-                'overlapping_leases': [],
-                'num_overlapping_leases': 0,
-                'illegal_area_ha': 0
-            }
+        
+        # A covering lease overlaps the whole detection; only partial pairs need an overlay
+        overlap_ha = total_area_m2[det_idx] / 10000
+        partial = ~pair_covered
+        if partial.any():
+            overlap_ha[partial] = _overlay_area(
+                shapely.intersection, geoms[det_idx[partial]], lease_geoms[lease_idx[partial]]
+            ) / 10000
+        overlap_ha = _round_values(overlap_ha, 2)
+        
+        covered = np.zeros(len(geoms), dtype=bool)
+        covered[det_idx[pair_covered]] = True
+        
+        unknown = np.full(len(lease_gdf), 'unknown', dtype=object)
+        lease_ids = lease_gdf['lease_id'].to_numpy() if 'lease_id' in lease_gdf.columns else unknown
+        lease_names = lease_gdf['lease_name'].to_numpy() if 'lease_name' in lease_gdf.columns else unknown
+        records = [
+            {'lease_id': lease_id, 'lease_name': lease_name, 'overlap_area_ha': area}
+            for lease_id, lease_name, area in zip(
+                lease_ids[lease_idx].tolist(), lease_names[lease_idx].tolist(), overlap_ha.tolist()
+            )
+        ]
+        bounds = np.cumsum(np.bincount(det_idx, minlength=len(geoms)))
+        starts = np.concatenate(([0], bounds[:-1]))
+        overlapping_leases = [records[a:b] for a, b in zip(starts.tolist(), bounds.tolist())]
+        return covered, overlapping_leases
     
-    def _classify_mining_status(self, outside_area_ha: float, 
-                               overlap_percentage: float) -> str:
-        """Classify mining status based on area outside lease boundaries"""
+    def _union_overlay(self, geoms: np.ndarray, valid: np.ndarray, total_area_m2: np.ndarray,
+                       covered: np.ndarray, lease_union: Union[Polygon, MultiPolygon]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Split each detected polygon's area into the parts inside and outside the lease union
         
-        # Legal: minimal area outside lease boundaries
-        if outside_area_ha <= self.tolerance_ha:
-            return 'legal'
+        Uses shapely ufuncs over the whole array; the prepared union is the
+        first argument of every predicate so its index is reused.
         
-        # Mixed: some area outside but mostly within lease
-        elif overlap_percentage >= 80:
-            return 'mixed'
+        Returns:
+            Tuple: inside and outside areas (m²), NaN for invalid geometries
+        """
+        inside = np.where(covered, total_area_m2, 0.0)
+        outside = np.where(covered, 0.0, total_area_m2)
+        inside[~valid] = outside[~valid] = np.nan
         
-        # Illegal: significant area outside lease boundaries
-        else:
-            return 'illegal'
+        # Not covered by a single lease: inside the union, outside it, or straddling.
+        # Detections whose envelope misses the union's are outside without a GEOS call
+        rest = np.flatnonzero(valid & ~covered)
+        det_bounds = shapely.bounds(geoms[rest])
+        union_minx, union_miny, union_maxx, union_maxy = lease_union.bounds
+        rest = rest[
+            (det_bounds[:, 2] >= union_minx) & (det_bounds[:, 0] <= union_maxx) &
+            (det_bounds[:, 3] >= union_miny) & (det_bounds[:, 1] <= union_maxy)
+        ]
+        in_union = shapely.contains(lease_union, geoms[rest])
+        inside[rest[in_union]] = total_area_m2[rest[in_union]]
+        outside[rest[in_union]] = 0.0
+        rest = rest[~in_union]
+        straddling = rest[shapely.intersects(lease_union, geoms[rest])]
+        
+        # Only straddling detections pay for the overlays
+        inside[straddling] = _overlay_area(shapely.intersection, geoms[straddling], lease_union)
+        outside[straddling] = _overlay_area(shapely.difference, geoms[straddling], lease_union)
+        return inside, outside
+    
+    def _classify_mining_status(self, outside_area_ha: np.ndarray,
+                               overlap_percentage: np.ndarray) -> np.ndarray:
+        """Classify mining status based on area outside lease boundaries"""
+        return np.select(
+            [
+                # Legal: minimal area outside lease boundaries
+                outside_area_ha <= self.tolerance_ha,
+                # Mixed: some area outside but mostly within lease
+                overlap_percentage >= 80
+            ],
+            ['legal', 'mixed'],
+            # Illegal: significant area outside lease boundaries
+            default='illegal'
+        ).astype(object)
     
-    def _calculate_confidence_score(self, total_area_ha: float, 
-                                   overlap_percentage: float,
-                                   num_overlapping_leases: int) -> float:
-        """Calculate confidence score for the classification"""
+    def _calculate_confidence_score(self, total_area_ha: np.ndarray,
+                                   overlap_percentage: np.ndarray,
+                                   num_overlapping_leases: np.ndarray) -> np.ndarray:
+        """Calculate confidence scores for the classifications"""
         
         # Base confidence on overlap percentage
-        if overlap_percentage >= 95:
-            base_confidence = 0.95
-        elif overlap_percentage >= 80:
-            base_confidence = 0.85
-        elif overlap_percentage >= 50:
-            base_confidence = 0.70
-        else:
-            base_confidence = 0.60
+        base_confidence = np.select(
+            [overlap_percentage >= 95, overlap_percentage >= 80, overlap_percentage >= 50],
+            [0.95, 0.85, 0.70],
+            default=0.60
+        )
         
         # Adjust based on area size (larger areas are more reliable)
-        if total_area_ha >= 10:
-            area_factor = 1.0
-        elif total_area_ha >= 1:
-            area_factor = 0.9
-        else:
-            area_factor = 0.8
+        area_factor = np.select([total_area_ha >= 10, total_area_ha >= 1], [1.0, 0.9], default=0.8)
         
-        # Adjust based on number of overlapping leases
-        if num_overlapping_leases == 1:
-            lease_factor = 1.0
-        elif num_overlapping_leases > 1:
-            lease_factor = 0.9  # Multiple leases can be confusing
-        else:
-            lease_factor = 0.8  # No overlapping leases
+        # Adjust based on number of overlapping leases; multiple leases can be
+        # confusing, none at all least reliable
+        lease_factor = np.select(
+            [num_overlapping_leases == 1, num_overlapping_leases > 1], [1.0, 0.9], default=0.8
+        )
         
         confidence = base_confidence * area_factor * lease_factor
-        return min(1.0, max(0.0, confidence))
+        return np.clip(confidence, 0.0, 1.0)
     
     def generate_summary_statistics(self, results_gdf: gpd.GeoDataFrame) -> Dict:
         """Generate summary statistics from analysis results"""
@@ -353,18 +617,21 @@ class IllegalMiningDetector:
                 'violation_rate_percent': 0
             }
         
-        # Count areas by status
-        status_counts = results_gdf['status'].value_counts()
-        
-        # Calculate areas by status
-        legal_mask = results_gdf['status'] == 'legal'
-        illegal_mask = results_gdf['status'] == 'illegal'
-        mixed_mask = results_gdf['status'] == 'mixed'
+        # Status masks and area columns as flat arrays; the area columns are
+        # already rounded to 0.01 ha, so float32 inputs lose nothing that
+        # survives the final rounding, and the sums accumulate in float64
+        status = results_gdf['status'].to_numpy()
+        legal_mask = status == 'legal'
+        illegal_mask = status == 'illegal'
+        mixed_mask = status == 'mixed'
+        total_areas = results_gdf['total_area_ha'].to_numpy(dtype=np.float32)
+        illegal_areas = results_gdf['illegal_area_ha'].to_numpy(dtype=np.float32)
         
-        total_area = results_gdf['total_area_ha'].sum()
-        legal_area = results_gdf[legal_mask]['total_area_ha'].sum()
-        illegal_area = results_gdf[illegal_mask]['illegal_area_ha'].sum()
-        mixed_area = results_gdf[mixed_mask]['illegal_area_ha'].sum()
+        # NaN areas (failed rows) are skipped, as pandas' sum would
+        total_area = float(np.nansum(total_areas, dtype=np.float64))
+        legal_area = float(np.nansum(total_areas[legal_mask], dtype=np.float64))
+        illegal_area = float(np.nansum(illegal_areas[illegal_mask], dtype=np.float64))
+        mixed_area = float(np.nansum(illegal_areas[mixed_mask], dtype=np.float64))
         
         # Calculate rates
         compliance_rate = (legal_area / total_area * 100) if total_area > 0 else 0
@@ -372,15 +639,15 @@ class IllegalMiningDetector:
         
         return {
             'total_detected_areas': len(results_gdf),
-            'legal_areas': status_counts.get('legal', 0),
-            'illegal_areas': status_counts.get('illegal', 0),
-            'mixed_areas': status_counts.get('mixed', 0),
+            'legal_areas': int(legal_mask.sum()),
+            'illegal_areas': int(illegal_mask.sum()),
+            'mixed_areas': int(mixed_mask.sum()),
             'total_detected_area_ha': round(total_area, 2),
             'legal_area_ha': round(legal_area, 2),
             'illegal_area_ha': round(illegal_area + mixed_area, 2),
             'compliance_rate_percent': round(compliance_rate, 1),
             'violation_rate_percent': round(violation_rate, 1),
-            'average_confidence': round(results_gdf['confidence'].mean(), 2)
+            'average_confidence': round(float(results_gdf['confidence'].mean()), 2)
         }
     
     def export_results(self, results_gdf: gpd.GeoDataFrame, 
@@ -394,19 +661,22 @@ class IllegalMiningDetector:
             
             if format == 'geojson' or format == 'all':
                 geojson_path = os.path.join(output_dir, 'illegal_mining_analysis.geojson')
-                results_gdf.to_file(geojson_path, driver='GeoJSON')
+                results_gdf.to_file(geojson_path, driver='GeoJSON', engine='pyogrio')
                 exported_files['geojson'] = geojson_path
             
             if format == 'shapefile' or format == 'all':
                 shp_path = os.path.join(output_dir, 'illegal_mining_analysis.shp')
-                results_gdf.to_file(shp_path, driver='ESRI Shapefile')
+                results_gdf.to_file(shp_path, driver='ESRI Shapefile', engine='pyogrio')
                 exported_files['shapefile'] = shp_path
             
             if format == 'csv' or format == 'all':
                 csv_path = os.path.join(output_dir, 'illegal_mining_analysis.csv')
-                # Drop geometry column for CSV
-                csv_data = results_gdf.drop(columns=['geometry'])
-                csv_data.to_csv(csv_path, index=False)
+                # Select the non-geometry columns at write time instead of
+                # materialising a geometry-less copy of the frame
+                geometry_name = results_gdf.geometry.name
+                csv_columns = [col for col in results_gdf.columns if col != geometry_name]
+                results_gdf.to_csv(csv_path, columns=csv_columns, index=False,
+                                   chunksize=CSV_EXPORT_CHUNK_SIZE)
                 exported_files['csv'] = csv_path
             
             # Export summary statistics
@@ -431,10 +701,11 @@ def compare_with_lease(detected_polygons: gpd.GeoDataFrame,
     detector = IllegalMiningDetector(buffer_meters)
     return detector.compare_with_lease(detected_polygons, lease_polygons)
 
-def read_lease_shapefile(path: str) -> gpd.GeoDataFrame:
+def read_lease_shapefile(path: str,
+                         aoi_bbox: Optional[Tuple[float, float, float, float]] = None) -> gpd.GeoDataFrame:
     """Read lease boundaries from file"""
     detector = IllegalMiningDetector()
-    return detector.read_lease_shapefile(path)
+    return detector.read_lease_shapefile(path, aoi_bbox)
 
 if __name__ == "__main__":
     # Test illegal mining detection
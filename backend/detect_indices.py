@@ -8,6 +8,7 @@ import numpy as np
 import logging
 from typing import Dict, List, Optional, Tuple
 import geopandas as gpd
+import shapely
 from shapely.geometry import Polygon, MultiPolygon, shape
 from shapely.ops import unary_union
 from rasterio.features import shapes as rio_shapes
@@ -17,10 +18,32 @@ from skimage.measure import label, regionprops
 import json
 import os
 
+# Footprints for opening/closing the raw mask, built once rather than per call
+_OPEN_FOOTPRINT = np.ones((3, 3), dtype=bool)
+_CLOSE_FOOTPRINT = np.ones((5, 5), dtype=bool)
+
+# Structuring elements for reconnecting mask fragments after cleaning
+_CONNECT_STRUCTURE = np.ones((3, 3), dtype=bool)
+_ERODE_STRUCTURE = np.ones((2, 2), dtype=bool)
+
+# Margin (pixels) kept around the detections' bounding box for the morphology
+# passes; wider than the combined reach of every footprint above, so cropping
+# never changes the cleaned mask
+_MORPHOLOGY_PAD = 8
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _padded_bounding_window(mask: np.ndarray, pad: int) -> Tuple[slice, slice]:
+    """Row/column slices of the mask's non-zero bounding box grown by pad pixels, clipped to the array"""
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    return (
+        slice(max(rows[0] - pad, 0), min(rows[-1] + 1 + pad, mask.shape[0])),
+        slice(max(cols[0] - pad, 0), min(cols[-1] + 1 + pad, mask.shape[1]))
+    )
+
 class MiningDetector:
     """Mining detection using spectral indices"""
     
@@ -63,13 +86,12 @@ class MiningDetector:
             logger.info(f"🔍 Analyzing {raster_path} for mining activities")
             
             with rasterio.open(raster_path) as src:
-                # Read bands
-                blue = src.read(self.sentinel2_bands['B2'] + 1).astype(np.float32)
-                green = src.read(self.sentinel2_bands['B3'] + 1).astype(np.float32)
-                red = src.read(self.sentinel2_bands['B4'] + 1).astype(np.float32)
-                nir = src.read(self.sentinel2_bands['B8'] + 1).astype(np.float32)
-                swir1 = src.read(self.sentinel2_bands['B11'] + 1).astype(np.float32)
-                swir2 = src.read(self.sentinel2_bands['B12'] + 1).astype(np.float32)
+                # Read bands in one call, converted to float32 by the reader
+                # rather than through a second full-size astype copy
+                blue, green, red, nir, swir1, swir2 = src.read(
+                    [self.sentinel2_bands[band] + 1 for band in ('B2', 'B3', 'B4', 'B8', 'B11', 'B12')],
+                    out_dtype=np.float32
+                )
                 
                 # Calculate spectral indices
                 indices = self._calculate_spectral_indices(blue, green, red, nir, swir1, swir2)
@@ -77,15 +99,28 @@ class MiningDetector:
                 # Generate mining mask
                 mining_mask = self._create_mining_mask(indices)
                 
-                # Apply morphological operations
-                cleaned_mask = self._clean_mask(mining_mask)
-                
-                # Apply additional morphological operations to connect nearby pixels
-                from scipy.ndimage import binary_dilation, binary_erosion
-                # Dilate to connect nearby pixels
-                cleaned_mask = binary_dilation(cleaned_mask, structure=np.ones((3, 3)))
-                # Erode back to original size
-                cleaned_mask = binary_erosion(cleaned_mask, structure=np.ones((2, 2)))
+                if mining_mask.any():
+                    # Run the morphology only over the detections' bounding box
+                    # (plus margin); everything outside it is and stays zero
+                    window = _padded_bounding_window(mining_mask, _MORPHOLOGY_PAD)
+                    
+                    # Apply morphological operations
+                    cleaned = self._clean_mask(mining_mask[window])
+                    
+                    # Apply additional morphological operations to connect nearby pixels
+                    # Dilate to connect nearby pixels
+                    cleaned = ndimage.binary_dilation(cleaned, structure=_CONNECT_STRUCTURE)
+                    # Erode back to original size
+                    cleaned = ndimage.binary_erosion(cleaned, structure=_ERODE_STRUCTURE)
+                    
+                    # Kept as contiguous uint8 (0/1) end to end, the dtype the
+                    # mask GeoTIFF and the polygonizer both take as is
+                    cleaned_mask = np.zeros(mining_mask.shape, dtype=np.uint8)
+                    cleaned_mask[window] = cleaned
+                else:
+                    # Nothing detected: every morphology pass would return the
+                    # same all-zero mask, so skip them
+                    cleaned_mask = mining_mask
                 
                 # Save mask if output path provided
                 if output_path:
@@ -176,19 +211,12 @@ class MiningDetector:
         low_evi = indices['evi'] < 0.1    # Low enhanced vegetation
         disturbed_nbr = indices['nbr'] < 0.1  # Disturbed areas (low NBR)
         
-        # Combine criteria (at least 3 out of 7 conditions must be met)
-        conditions = np.stack([
-            low_vegetation,
-            high_bare_soil,
-            low_water,
-            high_builtup,
-            low_savi,
-            low_evi,
-            disturbed_nbr
-        ], axis=0)
-        
-        # Count how many conditions are met for each pixel
-        condition_count = np.sum(conditions, axis=0)
+        # Combine criteria: count how many conditions are met for each pixel,
+        # accumulating the boolean masks in place into a uint8 counter rather
+        # than stacking them and summing into an int64 array
+        condition_count = low_vegetation.astype(np.uint8)
+        for condition in (high_bare_soil, low_water, high_builtup, low_savi, low_evi, disturbed_nbr):
+            condition_count += condition
         
         # Mining mask: at least 4 conditions met
         mining_mask = condition_count >= 4
@@ -202,9 +230,9 @@ class MiningDetector:
         )
         
         # Combine masks
-        final_mask = mining_mask | mining_signature
+        mining_mask |= mining_signature
         
-        return final_mask.astype(np.uint8)
+        return mining_mask.view(np.uint8)
     
     def _clean_mask(self, mask: np.ndarray) -> np.ndarray:
         """Clean mining mask using morphological operations"""
@@ -214,10 +242,10 @@ class MiningDetector:
         cleaned = remove_small_objects(mask.astype(bool), min_size=min_size)
         
         # Apply morphological opening (remove small holes)
-        cleaned = binary_opening(cleaned, footprint=np.ones((3, 3)))
+        cleaned = binary_opening(cleaned, footprint=_OPEN_FOOTPRINT)
         
         # Apply morphological closing (fill small gaps)
-        cleaned = binary_closing(cleaned, footprint=np.ones((5, 5)))
+        cleaned = binary_closing(cleaned, footprint=_CLOSE_FOOTPRINT)
         
         # Remove small objects again after morphological operations
         cleaned = remove_small_objects(cleaned, min_size=min_size)
@@ -228,11 +256,15 @@ class MiningDetector:
                    output_path: str):
         """Save mining mask as GeoTIFF"""
         
+        # The mask is 0/1, so it is stored bit-packed (NBITS=1) and deflated;
+        # GDAL readers expand it back to uint8 transparently
         profile = src.profile.copy()
         profile.update({
             'dtype': rasterio.uint8,
             'count': 1,
-            'nodata': 0
+            'nodata': 0,
+            'nbits': 1,
+            'compress': 'deflate'
         })
         
         with rasterio.open(output_path, 'w', **profile) as dst:
@@ -245,8 +277,8 @@ class MiningDetector:
         # Calculate pixel area in square meters
         pixel_area_m2 = abs(src.transform.a * src.transform.e)
         
-        # Count mining pixels
-        mining_pixels = np.sum(mask)
+        # Count mining pixels (a popcount-style scan, no widening sum)
+        mining_pixels = np.count_nonzero(mask)
         total_pixels = mask.size
         
         # Calculate area in hectares
@@ -284,35 +316,41 @@ class MiningDetector:
             
             # Polygonize directly from mask using rasterio.features.shapes
             # This is more robust than regionprops->coords hulls and preserves topology
-            mask_bool = mask.astype(bool)
-            polygons = []
-            properties = []
+            # A 0/1 uint8 mask serves as both the source and the shapes() mask,
+            # so no bool and uint8 copies of the full raster are made
+            mask_u8 = np.ascontiguousarray(mask, dtype=np.uint8)
 
-            # Generate GeoJSON-like shapes
-            for geom, value in rio_shapes(mask.astype(np.uint8), mask=mask_bool, transform=transform):
-                if int(value) != 1:
-                    continue
-                poly = shape(geom)
-                if not poly.is_valid or poly.is_empty:
-                    continue
-
-                # Compute area in hectares using rough WGS84 conversion (EPSG:4326)
-                # For higher accuracy, users should reproject to equal-area CRS upstream.
-                area_ha = (poly.area * 111000.0 * 111000.0) / 10000.0
-                if min_area_ha is not None and area_ha < min_area_ha:
-                    continue
+            # Generate GeoJSON-like shapes, then measure and filter them as arrays;
+            # an empty mask has nothing to trace, so the raster scan is skipped
+            if not mask_u8.any():
+                polygons = np.empty(0, dtype=object)
+            else:
+                polygons = np.array([
+                    shape(geom)
+                    for geom, value in rio_shapes(mask_u8, mask=mask_u8, transform=transform)
+                    if int(value) == 1
+                ], dtype=object)
+            if len(polygons):
+                polygons = polygons[shapely.is_valid(polygons) & ~shapely.is_empty(polygons)]
 
-                properties.append({
-                    'area_ha': round(area_ha, 2),
-                    'area_m2': round(area_ha * 10000.0, 0),
-                    'perimeter_m': round(poly.length * 111000.0, 0),
-                    'compactness': round(4 * np.pi * poly.area / (poly.length ** 2 + 1e-9), 3),
-                    'mining_id': f"mining_{len(polygons)+1}"
-                })
-                polygons.append(poly)
+            # Compute area in hectares using rough WGS84 conversion (EPSG:4326)
+            # For higher accuracy, users should reproject to equal-area CRS upstream.
+            area = shapely.area(polygons)
+            length = shapely.length(polygons)
+            area_ha = (area * 111000.0 * 111000.0) / 10000.0
+            if min_area_ha is not None:
+                keep = ~(area_ha < min_area_ha)
+                polygons, area, length, area_ha = polygons[keep], area[keep], length[keep], area_ha[keep]
 
-            if polygons:
-                gdf = gpd.GeoDataFrame(properties, geometry=polygons, crs=crs)
+            if len(polygons):
+                properties = {
+                    'area_ha': np.round(area_ha, 2),
+                    'area_m2': np.round(area_ha * 10000.0, 0),
+                    'perimeter_m': np.round(length * 111000.0, 0),
+                    'compactness': np.round(4 * np.pi * area / (length ** 2 + 1e-9), 3),
+                    'mining_id': [f"mining_{i}" for i in range(1, len(polygons) + 1)]
+                }
+                gdf = gpd.GeoDataFrame(properties, geometry=list(polygons), crs=crs)
                 logger.info(f"✅ Created {len(gdf)} mining polygons")
                 return gdf
             else:
@@ -362,10 +400,12 @@ class MiningDetector:
             
             # Calculate additional statistics
             if not polygons_gdf.empty:
-                total_detected_area = polygons_gdf['area_ha'].sum()
-                avg_area = polygons_gdf['area_ha'].mean()
-                max_area = polygons_gdf['area_ha'].max()
-                min_area = polygons_gdf['area_ha'].min()
+                # One array for all four stats; the mean comes from the sum
+                areas = polygons_gdf['area_ha'].to_numpy(dtype=np.float64)
+                total_detected_area = float(areas.sum())
+                avg_area = total_detected_area / len(areas)
+                max_area = float(areas.max())
+                min_area = float(areas.min())
             else:
                 total_detected_area = avg_area = max_area = min_area = 0
             
@@ -391,6 +431,23 @@ class MiningDetector:
             logger.error(f"❌ Error in mining detection pipeline: {e}")
             return {}
 
+    def detect_mining_polygons(self, raster_path: str, output_dir: str = None) -> Dict:
+        """
+        Detection pipeline without the full-raster arrays in its result
+        
+        Same as detect_mining_areas, but the mask and spectral index arrays
+        are dropped from 'detection_results' (the mask is still written to
+        mask_path), so running it in a worker process only sends polygons,
+        statistics and paths back instead of the whole scene.
+        """
+        results = self.detect_mining_areas(raster_path, output_dir)
+        if results:
+            results['detection_results'] = {
+                key: value for key, value in results['detection_results'].items()
+                if key not in ('mask', 'indices')
+            }
+        return results
+
 # Standalone functions for easy integration
 def generate_mining_mask(raster_path: str, output_path: str = None) -> Dict:
     """Generate mining detection mask"""
@@ -9,12 +9,43 @@ import logging
 from typing import Dict, List, Optional, Tuple
 import json
 from datetime import datetime, timedelta
+import math
+import functools
 import rasterio
+from rasterio.merge import merge
 import numpy as np
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
 import tempfile
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Maximum concurrent band/tile downloads from Earth Engine, per process
+MAX_PARALLEL_DOWNLOADS = int(os.getenv('GEE_MAX_PARALLEL_DOWNLOADS', '8'))
+
+# Largest tile edge (pixels) per getDownloadURL request; bigger AOIs are split
+# into an aligned grid of tiles that download in parallel and are mosaicked
+DOWNLOAD_TILE_PX = int(os.getenv('GEE_DOWNLOAD_TILE_PX', '2048'))
+
+# Earth Engine's high-volume endpoint is meant for many concurrent automated
+# requests like the tile downloads; set GEE_HIGH_VOLUME=0 to use the default
+GEE_HIGH_VOLUME_URL = 'https://earthengine-highvolume.googleapis.com'
+USE_HIGH_VOLUME_ENDPOINT = os.getenv('GEE_HIGH_VOLUME', '1') == '1'
+
+# Composite graphs memoized per (AOI, dates, filter) so repeat analyses of the
+# same AOI reuse the already-built EE objects
+COMPOSITE_CACHE_SIZE = int(os.getenv('GEE_COMPOSITE_CACHE_SIZE', '128'))
+
+# One download pool for the whole process, so concurrent jobs (and the
+# Sentinel-2/DEM downloads within a job) share the MAX_PARALLEL_DOWNLOADS cap
+# instead of each _download_images call getting that many threads of its own
+_download_pool = ThreadPoolExecutor(max_workers=max(1, MAX_PARALLEL_DOWNLOADS),
+                                    thread_name_prefix='ee-download')
+
+# Metres per degree at the equator, which is how EE maps `scale` onto EPSG:4326
+METERS_PER_DEGREE = 111319.49079327357
 
 # Load environment variables from common paths
 _env_loaded = False
@@ -44,7 +75,10 @@ class GEEUtils:
             # Earth Engine Python SDK uses OAuth credentials, not API keys.
             # Ensure you've run `earthengine authenticate` once on this machine.
             project_id = os.getenv('EE_PROJECT_ID') or 'car-pooling-dc7a3'
-            ee.Initialize(project=project_id)
+            if USE_HIGH_VOLUME_ENDPOINT:
+                ee.Initialize(project=project_id, opt_url=GEE_HIGH_VOLUME_URL)
+            else:
+                ee.Initialize(project=project_id)
             logger.info(f"✅ Google Earth Engine initialized (project={project_id})")
         except Exception as e:
             logger.error(f"❌ GEE initialization failed: {e}")
@@ -57,6 +91,14 @@ class GEEUtils:
         self.srtm = ee.Image('USGS/SRTMGL1_003')
         self.alos_dem = ee.Image('JAXA/ALOS/AW3D30/V2_2')
         
+        # One pooled HTTP session so parallel band downloads reuse keep-alive
+        # TLS connections to the Earth Engine download host; sized to the
+        # shared download pool, which bounds the requests in flight
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, MAX_PARALLEL_DOWNLOADS))
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+        
         # Define bands for different sensors
         self.sentinel2_bands = {
             'B2': 'Blue',
@@ -98,43 +140,22 @@ class GEEUtils:
         try:
             logger.info(f"🛰️ Downloading Sentinel-2 data for AOI from {start_date} to {end_date}")
             
-            # Convert GeoJSON to EE geometry
-            aoi = ee.Geometry.Polygon(aoi_geojson['coordinates'])
-            
             # Default bands if not specified
             if bands is None:
                 bands = ['B2', 'B3', 'B4', 'B8', 'B11', 'B12']
 
-            # Filter Sentinel-2 collection (do NOT select bands before masking; QA60 needed)
-            collection = (self.sentinel2
-                          .filterDate(start_date, end_date)
-                          .filterBounds(aoi)
-                          .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', max_cloud_cover)))
-
-            # Create cloud-free composite
-            def mask_clouds(image):
-                qa = image.select('QA60')
-                cloud_mask = qa.bitwiseAnd(1024).eq(0).And(qa.bitwiseAnd(2048).eq(0))
-                return image.updateMask(cloud_mask).divide(10000)
-
-            composite = collection.map(mask_clouds).median().clip(aoi)
-            composite = composite.select(bands)
+            composite = _sentinel2_composite(
+                _aoi_key(aoi_geojson), start_date, end_date, max_cloud_cover
+            ).select(bands)
 
-            # Download each band and stack locally into a multi-band GeoTIFF
+            # Download bands (and their tiles) concurrently and stack locally into a multi-band GeoTIFF
             temp_dir = tempfile.mkdtemp(prefix="s2_dl_")
-            temp_band_paths: List[str] = []
+
             try:
-                for band in bands:
-                    single_band = composite.select([band])
-                    url = single_band.getDownloadURL({
-                        'region': aoi.coordinates().getInfo(),
-                        'scale': 10,
-                        'crs': 'EPSG:4326',
-                        'format': 'GEO_TIFF'
-                    })
-                    band_path = os.path.join(temp_dir, f"{band}.tif")
-                    self._download_file(url, band_path)
-                    temp_band_paths.append(band_path)
+                band_paths = self._download_images(
+                    {band: composite.select([band]) for band in bands}, aoi_geojson, 10, temp_dir
+                )
+                temp_band_paths: List[str] = [band_paths[band] for band in bands]
 
                 # Stack bands into a single GeoTIFF
                 with rasterio.open(temp_band_paths[0]) as ref:
@@ -144,14 +165,14 @@ class GEEUtils:
                         'dtype': rasterio.float32,
                         'nodata': None
                     })
-                    data_arrays = []
-                    for p in temp_band_paths:
-                        with rasterio.open(p) as src:
-                            data_arrays.append(src.read(1).astype(np.float32))
 
+                # Copy each band block by block, so only one block of one band
+                # is in memory instead of every band of the whole AOI
                 with rasterio.open(out_path, 'w', **profile) as dst:
-                    for idx, arr in enumerate(data_arrays):
-                        dst.write(arr, idx + 1)
+                    for idx, p in enumerate(temp_band_paths):
+                        with rasterio.open(p) as src:
+                            for _, window in src.block_windows(1):
+                                dst.write(src.read(1, window=window, out_dtype=np.float32), idx + 1, window=window)
                         dst.set_band_description(idx + 1, self.sentinel2_bands.get(bands[idx], bands[idx]))
 
                 logger.info(f"✅ Sentinel-2 composite downloaded: {out_path}")
@@ -194,14 +215,8 @@ class GEEUtils:
             # Clip to AOI
             dem_clipped = dem.clip(aoi)
 
-            # Direct download via URL
-            url = dem_clipped.getDownloadURL({
-                'region': aoi.coordinates().getInfo(),
-                'scale': scale,
-                'crs': 'EPSG:4326',
-                'format': 'GEO_TIFF'
-            })
-            self._download_file(url, out_path)
+            # Direct (tiled) download via URL
+            self._download_image_to(dem_clipped, aoi_geojson, scale, out_path)
             logger.info(f"✅ {source} DEM downloaded: {out_path}")
             return True
             
@@ -227,31 +242,10 @@ class GEEUtils:
         try:
             logger.info(f"📡 Downloading Sentinel-1 SAR data for AOI")
             
-            # Convert GeoJSON to EE geometry
-            aoi = ee.Geometry.Polygon(aoi_geojson['coordinates'])
-            
-            # Filter Sentinel-1 collection
-            collection = (self.sentinel1
-                         .filterDate(start_date, end_date)
-                         .filterBounds(aoi)
-                         .filter(ee.Filter.eq('instrumentMode', 'IW'))
-                         .filter(ee.Filter.listContains('transmitterReceiverPolarisation', polarization))
-                         .select([f'{polarization}_dB']))
-            
-            # Create median composite
-            composite = collection.median()
-            
-            # Clip to AOI
-            composite = composite.clip(aoi)
+            composite = _sentinel1_composite(_aoi_key(aoi_geojson), start_date, end_date, polarization)
             
-            # Direct download via URL
-            url = composite.getDownloadURL({
-                'region': aoi.coordinates().getInfo(),
-                'scale': 10,
-                'crs': 'EPSG:4326',
-                'format': 'GEO_TIFF'
-            })
-            self._download_file(url, out_path)
+            # Direct (tiled) download via URL
+            self._download_image_to(composite, aoi_geojson, 10, out_path)
             logger.info(f"✅ Sentinel-1 SAR downloaded: {out_path}")
             return True
             
@@ -259,14 +253,65 @@ class GEEUtils:
             logger.error(f"❌ Error downloading Sentinel-1 SAR: {e}")
             return False
 
+    def _download_images(self, images: Dict[str, ee.Image], aoi_geojson: Dict,
+                         scale: float, out_dir: str) -> Dict[str, str]:
+        """
+        Download several images over the AOI through getDownloadURL
+        
+        Every (image, tile) request goes through the process-wide download
+        pool, so a large AOI with several bands keeps up to
+        MAX_PARALLEL_DOWNLOADS requests in flight instead of fetching one
+        band-sized export at a time, and concurrent jobs share that cap.
+        
+        Args:
+            images: Output name -> EE image (single band or stack)
+            aoi_geojson: GeoJSON polygon defining AOI
+            scale: Pixel size in metres
+            out_dir: Directory for the downloaded GeoTIFFs
+            
+        Returns:
+            Dict: Output name -> local GeoTIFF path
+        """
+        tiles = _download_tiles(aoi_geojson, scale, DOWNLOAD_TILE_PX)
+        jobs = [(name, idx, params) for name in images for idx, params in enumerate(tiles)]
+        
+        def download_tile(job: Tuple[str, int, Dict]) -> str:
+            name, idx, params = job
+            url = images[name].getDownloadURL(params)
+            tile_path = os.path.join(out_dir, f"{name}_{idx}.tif")
+            self._download_file(url, tile_path)
+            return tile_path
+        
+        tile_paths = list(_download_pool.map(download_tile, jobs))
+        
+        paths = {}
+        for k, name in enumerate(images):
+            name_tiles = tile_paths[k * len(tiles):(k + 1) * len(tiles)]
+            if len(name_tiles) == 1:
+                paths[name] = name_tiles[0]
+            else:
+                # Tiles share one pixel grid, so the mosaic is a plain paste
+                paths[name] = os.path.join(out_dir, f"{name}.tif")
+                merge(name_tiles, dst_path=paths[name])
+        return paths
+    
+    def _download_image_to(self, image: ee.Image, aoi_geojson: Dict, scale: float, out_path: str) -> None:
+        """Download one image over the AOI (tiled when large) to out_path"""
+        temp_dir = tempfile.mkdtemp(prefix="ee_dl_")
+        try:
+            path = self._download_images({'image': image}, aoi_geojson, scale, temp_dir)['image']
+            shutil.move(path, out_path)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
     def _download_file(self, url: str, out_path: str) -> None:
         """Download a file from URL to local path."""
-        resp = requests.get(url, stream=True, timeout=300)
-        resp.raise_for_status()
-        with open(out_path, 'wb') as f:
-            for chunk in resp.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+        with self.http.get(url, stream=True, timeout=300) as resp:
+            resp.raise_for_status()
+            with open(out_path, 'wb') as f:
+                for chunk in resp.iter_content(chunk_size=1 << 20):
+                    if chunk:
+                        f.write(chunk)
     
     def _create_demo_sentinel2_composite(self, aoi_geojson: Dict, out_path: str, bands: List[str]) -> bool:
         """Create demo Sentinel-2 composite for testing"""
@@ -352,13 +397,13 @@ class GEEUtils:
             width = int((max_lon - min_lon) * 111000 / 30)
             height = int((max_lat - min_lat) * 111000 / 30)
             
-            # Create realistic elevation data
+            # Create realistic elevation data; the terms vary along one axis
+            # each, so they broadcast from 1-D profiles instead of meshgrids
             x = np.linspace(min_lon, max_lon, width)
             y = np.linspace(min_lat, max_lat, height)
-            X, Y = np.meshgrid(x, y)
             
             # Base elevation (India average ~300m)
-            base_elevation = 300 + 50 * np.sin(X * 10) + 30 * np.cos(Y * 10)
+            base_elevation = 300 + 50 * np.sin(x * 10)[np.newaxis, :] + 30 * np.cos(y * 10)[:, np.newaxis]
             
             # Add mining pits (lower elevation)
             mining_pits = np.random.random((height, width)) < 0.05  # 5% mining areas
@@ -442,23 +487,122 @@ class GEEUtils:
             logger.error(f"❌ Error creating demo SAR composite: {e}")
             return False
 
+def _aoi_key(aoi_geojson: Dict) -> str:
+    """Hashable cache key for an AOI polygon (its canonical coordinate JSON)"""
+    return json.dumps(aoi_geojson['coordinates'], separators=(',', ':'))
+
+# Memoized at module level (not on GEEUtils methods) so the cache is keyed on
+# the query alone and doesn't hold a reference to the GEEUtils instance
+@functools.lru_cache(maxsize=COMPOSITE_CACHE_SIZE)
+def _sentinel2_composite(aoi_key: str, start_date: str, end_date: str,
+                         max_cloud_cover: int) -> ee.Image:
+    """Cloud-masked Sentinel-2 median composite clipped to the AOI (all bands)"""
+    # Convert GeoJSON to EE geometry
+    aoi = ee.Geometry.Polygon(json.loads(aoi_key))
+    
+    # Filter Sentinel-2 collection (do NOT select bands before masking; QA60 needed)
+    collection = (ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED')
+                  .filterDate(start_date, end_date)
+                  .filterBounds(aoi)
+                  .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', max_cloud_cover)))
+
+    # Create cloud-free composite
+    def mask_clouds(image):
+        qa = image.select('QA60')
+        cloud_mask = qa.bitwiseAnd(1024).eq(0).And(qa.bitwiseAnd(2048).eq(0))
+        return image.updateMask(cloud_mask).divide(10000)
+
+    return collection.map(mask_clouds).median().clip(aoi)
+
+@functools.lru_cache(maxsize=COMPOSITE_CACHE_SIZE)
+def _sentinel1_composite(aoi_key: str, start_date: str, end_date: str,
+                         polarization: str) -> ee.Image:
+    """Sentinel-1 IW median composite of one polarization clipped to the AOI"""
+    # Convert GeoJSON to EE geometry
+    aoi = ee.Geometry.Polygon(json.loads(aoi_key))
+    
+    # Filter Sentinel-1 collection
+    collection = (ee.ImageCollection('COPERNICUS/S1_GRD')
+                  .filterDate(start_date, end_date)
+                  .filterBounds(aoi)
+                  .filter(ee.Filter.eq('instrumentMode', 'IW'))
+                  .filter(ee.Filter.listContains('transmitterReceiverPolarisation', polarization))
+                  .select([f'{polarization}_dB']))
+    
+    # Create median composite, clipped to AOI
+    return collection.median().clip(aoi)
+
+def _download_tiles(aoi_geojson: Dict, scale: float, tile_px: int) -> List[Dict]:
+    """
+    getDownloadURL parameters covering the AOI in tiles of at most tile_px pixels a side
+    
+    An AOI that fits in one tile gets the plain region/scale request. Larger
+    ones are cut into tiles on a single EPSG:4326 pixel grid anchored at the
+    AOI's top-left corner (crs_transform + dimensions), so the tiles line up
+    exactly when mosaicked.
+    """
+    coords = aoi_geojson['coordinates'][0]
+    min_lon = min(coord[0] for coord in coords)
+    max_lon = max(coord[0] for coord in coords)
+    min_lat = min(coord[1] for coord in coords)
+    max_lat = max(coord[1] for coord in coords)
+    
+    pixel_deg = scale / METERS_PER_DEGREE
+    width = max(1, math.ceil((max_lon - min_lon) / pixel_deg))
+    height = max(1, math.ceil((max_lat - min_lat) / pixel_deg))
+    if width <= tile_px and height <= tile_px:
+        return [{
+            'region': aoi_geojson['coordinates'],
+            'scale': scale,
+            'crs': 'EPSG:4326',
+            'format': 'GEO_TIFF'
+        }]
+    
+    tiles = []
+    for row in range(0, height, tile_px):
+        for col in range(0, width, tile_px):
+            tiles.append({
+                'crs': 'EPSG:4326',
+                'crs_transform': [pixel_deg, 0, min_lon + col * pixel_deg,
+                                  0, -pixel_deg, max_lat - row * pixel_deg],
+                'dimensions': f"{min(tile_px, width - col)}x{min(tile_px, height - row)}",
+                'format': 'GEO_TIFF'
+            })
+    return tiles
+
+_shared_gee_utils: Optional[GEEUtils] = None
+_shared_gee_utils_lock = threading.Lock()
+
+def get_gee_utils() -> GEEUtils:
+    """Shared GEEUtils instance; Earth Engine is initialized on first use, not at import"""
+    global _shared_gee_utils
+    if _shared_gee_utils is None:
+        with _shared_gee_utils_lock:
+            if _shared_gee_utils is None:
+                _shared_gee_utils = GEEUtils()
+    return _shared_gee_utils
+
+def gee_utils_initialized() -> bool:
+    """Whether Earth Engine has been initialized in this process"""
+    return _shared_gee_utils is not None
+
 # Standalone functions for easy integration
 def download_sentinel2_aoi(aoi_geojson: Dict, start_date: str, end_date: str, 
                           out_path: str, bands: List[str] = None, 
                           max_cloud_cover: int = 20) -> bool:
     """Download Sentinel-2 data for AOI"""
-    gee_utils = GEEUtils()
+    gee_utils = get_gee_utils()
     return gee_utils.download_sentinel2_aoi(aoi_geojson, start_date, end_date, out_path, bands, max_cloud_cover)
 
 def download_dem(aoi_geojson: Dict, out_path: str, source: str = "SRTM") -> bool:
     """Download DEM data for AOI"""
-    gee_utils = GEEUtils()
+    gee_utils = get_gee_utils()
     return gee_utils.download_dem(aoi_geojson, out_path, source)
 
 def download_sentinel1_sar(aoi_geojson: Dict, start_date: str, end_date: str,
                           out_path: str, polarization: str = "VV") -> bool:
     """Download Sentinel-1 SAR data for AOI"""
-    gee_utils = GEEUtils()
+    gee_utils = get_gee_utils()
     return gee_utils.download_sentinel1_sar(aoi_geojson, start_date, end_date, out_path, polarization)
 
 if __name__ == "__main__":
@@ -0,0 +1,436 @@
+"""
+Job State Storage for Analysis Jobs
+Shared Redis- or SQLite-backed store so multiple API workers see the same jobs
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import orjson
+
+REDIS_URL = os.getenv('REDIS_URL', '').strip() or ''
+JOB_TTL_SECONDS = int(os.getenv('JOB_TTL_SECONDS', '86400'))
+MAX_JOBS = int(os.getenv('MAX_JOBS', '512'))
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', '').strip()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    namespace TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, job_id)
+);
+CREATE TABLE IF NOT EXISTS job_index (
+    namespace TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    status TEXT,
+    timestamp TEXT,
+    progress INTEGER,
+    PRIMARY KEY (namespace, job_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at);
+"""
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _json_default(obj: Any) -> Any:
+    """Fallback encoder for analysis payloads (GeoDataFrames, CRS objects, ...)"""
+    geo_interface = getattr(obj, '__geo_interface__', None)
+    if geo_interface is not None:
+        return geo_interface
+    return str(obj)
+
+def dumps_payload(payload: Dict[str, Any]) -> bytes:
+    """Encode a job payload (numpy values, geometries, ...) straight to JSON bytes"""
+    return orjson.dumps(
+        payload,
+        default=_json_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+
+_SUMMARY_FIELDS = ("status", "timestamp", "progress")
+
+def _summary(job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields listed by /api/jobs"""
+    return {
+        "job_id": job_id,
+        "status": payload.get("status"),
+        "timestamp": payload.get("timestamp"),
+        "progress": payload.get("progress", 0)
+    }
+
+class JobStore:
+    """Async job_id -> payload store backed by Redis, SQLite, or process memory"""
+
+    def __init__(self, namespace: str, redis_url: str = REDIS_URL, ttl: int = JOB_TTL_SECONDS,
+                 max_jobs: int = MAX_JOBS, db_path: str = JOB_STORE_PATH):
+        """
+        Initialize job store
+
+        Args:
+            namespace: Key prefix separating job kinds (e.g. 'analysis', 'demo')
+            redis_url: Redis connection URL; takes precedence over db_path
+            ttl: Seconds before a stored job expires
+            max_jobs: Maximum jobs kept in process memory before evicting
+            db_path: SQLite file shared by workers on one host; with neither backend
+                configured jobs stay in process memory
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._redis = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        # 2Q eviction: new jobs wait in a FIFO probation queue and are promoted to
+        # the LRU protected queue once read, so bulk submissions nobody polls are
+        # evicted before jobs that clients are actually following
+        self._probation: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._protected: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._stored_at: Dict[str, float] = {}
+        # job_id -> listing fields, kept in step with writes so listing never walks payloads
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+        self._lock: Optional[asyncio.Lock] = None
+
+        if redis_url:
+            from redis import asyncio as aioredis
+            self._redis = aioredis.from_url(redis_url)
+            logger.info(f"Job store '{namespace}' backed by Redis (ttl: {ttl}s)")
+        elif db_path:
+            self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False,
+                                       isolation_level=None)
+            # WAL lets other workers read while one of them writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+            logger.info(f"Job store '{namespace}' backed by SQLite at {db_path} (ttl: {ttl}s)")
+        else:
+            logger.info(f"Job store '{namespace}' kept in process memory (single worker only)")
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.namespace}:{job_id}"
+
+    @property
+    def _index_key(self) -> str:
+        # Outside the '<namespace>:*' pattern so items() never scans it
+        return f"index:{self.namespace}"
+
+    def _index_entry(self, job_id: str, payload: Dict[str, Any], ttl: int) -> bytes:
+        # The temp directory rides along so the sweep can release it after
+        # Redis has already dropped the job key itself
+        return orjson.dumps({
+            **_summary(job_id, payload),
+            "expires_at": time.time() + ttl,
+            "temp_directory": (payload.get('results') or {}).get('temp_directory')
+        })
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the server's running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _lookup(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._protected.get(job_id)
+        return job if job is not None else self._probation.get(job_id)
+
+    def _is_expired(self, job_id: str) -> bool:
+        # Past the TTL but not swept yet: treated as gone, like an expired Redis key
+        return time.monotonic() - self._stored_at.get(job_id, 0.0) > self.ttl
+
+    def _discard(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._stored_at.pop(job_id, None)
+        self._summaries.pop(job_id, None)
+        job = self._protected.pop(job_id, None)
+        return job if job is not None else self._probation.pop(job_id, None)
+
+    def _evict_one(self) -> Dict[str, Any]:
+        """Pop the next victim: oldest probation job while that queue holds over a quarter of capacity"""
+        if self._probation and (len(self._probation) > self.max_jobs // 4 or not self._protected):
+            job_id, payload = self._probation.popitem(last=False)
+        else:
+            job_id, payload = self._protected.popitem(last=False)
+        self._stored_at.pop(job_id, None)
+        self._summaries.pop(job_id, None)
+        return payload
+
+    def _db_get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT payload FROM jobs WHERE namespace = ? AND job_id = ? AND expires_at >= ?",
+                (self.namespace, job_id, time.time())
+            ).fetchone()
+        return orjson.loads(row[0]) if row is not None else None
+
+    def _db_contains(self, job_id: str) -> bool:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT 1 FROM jobs WHERE namespace = ? AND job_id = ? AND expires_at >= ?",
+                (self.namespace, job_id, time.time())
+            ).fetchone()
+        return row is not None
+
+    def _db_write(self, job_id: str, payload: Dict[str, Any], ttl: int) -> None:
+        summary = _summary(job_id, payload)
+        self._db.execute(
+            "INSERT OR REPLACE INTO jobs (namespace, job_id, payload, expires_at) VALUES (?, ?, ?, ?)",
+            (self.namespace, job_id, dumps_payload(payload), time.time() + ttl)
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO job_index (namespace, job_id, status, timestamp, progress) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, job_id, summary["status"], summary["timestamp"], summary["progress"])
+        )
+
+    def _db_set(self, job_id: str, payload: Dict[str, Any], ttl: int) -> None:
+        with self._db_lock, self._db:
+            self._db_write(job_id, payload, ttl)
+
+    def _db_update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        # BEGIN IMMEDIATE takes the write lock up front so concurrent workers
+        # cannot interleave their read-modify-write cycles
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT payload FROM jobs WHERE namespace = ? AND job_id = ?",
+                    (self.namespace, job_id)
+                ).fetchone()
+                if row is None:
+                    logger.warning(f"⚠️ Job {job_id} no longer stored; dropping update")
+                else:
+                    payload = orjson.loads(row[0])
+                    payload.update(fields)
+                    self._db_write(job_id, payload, self.ttl)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _db_items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT job_id, payload FROM jobs WHERE namespace = ? AND expires_at >= ?",
+                (self.namespace, time.time())
+            ).fetchall()
+        return [(job_id, orjson.loads(raw)) for job_id, raw in rows]
+
+    def _db_summaries(self) -> List[Dict[str, Any]]:
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT i.job_id, i.status, i.timestamp, i.progress FROM job_index i "
+                "JOIN jobs j ON j.namespace = i.namespace AND j.job_id = i.job_id "
+                "WHERE i.namespace = ? AND j.expires_at >= ?",
+                (self.namespace, time.time())
+            ).fetchall()
+        return [
+            {"job_id": job_id, "status": status, "timestamp": timestamp, "progress": progress}
+            for job_id, status, timestamp, progress in rows
+        ]
+
+    def _db_expire(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._db_lock, self._db:
+            rows = self._db.execute(
+                "SELECT job_id, payload FROM jobs WHERE namespace = ? AND expires_at < ?",
+                (self.namespace, now)
+            ).fetchall()
+            self._db.executemany(
+                "DELETE FROM job_index WHERE namespace = ? AND job_id = ?",
+                [(self.namespace, job_id) for job_id, _ in rows]
+            )
+            self._db.execute(
+                "DELETE FROM jobs WHERE namespace = ? AND expires_at < ?",
+                (self.namespace, now)
+            )
+        return [orjson.loads(raw) for _, raw in rows]
+
+    async def _release(self, payload: Dict[str, Any]) -> None:
+        """Remove on-disk artifacts of a dropped job"""
+        temp_dir = (payload.get('results') or {}).get('temp_directory')
+        if temp_dir:
+            await asyncio.to_thread(shutil.rmtree, temp_dir, True)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the payload for a job, or None if it does not exist"""
+        if self._db is not None:
+            return await asyncio.to_thread(self._db_get, job_id)
+        if self._redis is None:
+            if self._is_expired(job_id):
+                # The next expire() sweep drops it and releases its temp directory
+                return None
+            job = self._protected.get(job_id)
+            if job is not None:
+                self._protected.move_to_end(job_id)
+                return job
+            job = self._probation.pop(job_id, None)
+            if job is not None:
+                self._protected[job_id] = job
+            return job
+        raw = await self._redis.get(self._key(job_id))
+        return orjson.loads(raw) if raw is not None else None
+
+    async def contains(self, job_id: str) -> bool:
+        """Whether a job is still stored (not evicted or expired), without decoding its payload"""
+        if self._db is not None:
+            return await asyncio.to_thread(self._db_contains, job_id)
+        if self._redis is None:
+            # Counts as a read, so jobs served from caches stay protected from eviction
+            return await self.get(job_id) is not None
+        return bool(await self._redis.exists(self._key(job_id)))
+
+    async def set(self, job_id: str, payload: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Store (or replace) the payload for a job"""
+        if self._db is not None:
+            await asyncio.to_thread(self._db_set, job_id, payload, ttl or self.ttl)
+            return
+        if self._redis is None:
+            evicted = []
+            async with self.lock:
+                if job_id in self._protected:
+                    self._protected[job_id] = payload
+                    self._protected.move_to_end(job_id)
+                else:
+                    self._probation[job_id] = payload
+                self._stored_at[job_id] = time.monotonic()
+                self._summaries[job_id] = _summary(job_id, payload)
+                while len(self._probation) + len(self._protected) > self.max_jobs:
+                    evicted.append(self._evict_one())
+            for old_payload in evicted:
+                await self._release(old_payload)
+            return
+        ttl = ttl or self.ttl
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.setex(self._key(job_id), ttl, dumps_payload(payload))
+            pipe.hset(self._index_key, job_id, self._index_entry(job_id, payload, ttl))
+            await pipe.execute()
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        """Merge fields into an existing job payload"""
+        if self._db is not None:
+            await asyncio.to_thread(self._db_update, job_id, fields)
+            return
+        if self._redis is None:
+            async with self.lock:
+                job = self._lookup(job_id)
+                if job is None or self._is_expired(job_id):
+                    logger.warning(f"⚠️ Job {job_id} no longer stored; dropping update")
+                    return
+                job.update(fields)
+                # Re-arm the TTL like the Redis/SQLite backends, so a long
+                # running job isn't expired (and its scratch dir removed) mid-run
+                self._stored_at[job_id] = time.monotonic()
+                if not fields.keys().isdisjoint(_SUMMARY_FIELDS):
+                    self._summaries[job_id] = _summary(job_id, job)
+            return
+        from redis.exceptions import WatchError
+        key = self._key(job_id)
+        # WATCH/MULTI turns the read-modify-write into a compare-and-set, so
+        # concurrent updates from other workers are retried instead of lost
+        async with self._redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    raw = await pipe.get(key)
+                    if raw is None:
+                        logger.warning(f"⚠️ Job {job_id} no longer stored; dropping update")
+                        return
+                    payload = orjson.loads(raw)
+                    payload.update(fields)
+                    pipe.multi()
+                    pipe.setex(key, self.ttl, dumps_payload(payload))
+                    pipe.hset(self._index_key, job_id, self._index_entry(job_id, payload, self.ttl))
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    continue
+
+    async def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return all (job_id, payload) pairs currently stored"""
+        if self._db is not None:
+            return await asyncio.to_thread(self._db_items)
+        if self._redis is None:
+            return [
+                (job_id, job)
+                for queue in (self._probation, self._protected)
+                for job_id, job in queue.items()
+                if not self._is_expired(job_id)
+            ]
+        keys = [key async for key in self._redis.scan_iter(match=self._key('*'))]
+        if not keys:
+            return []
+        prefix_len = len(self.namespace) + 1
+        values = await self._redis.mget(keys)
+        return [
+            (key.decode()[prefix_len:], orjson.loads(raw))
+            for key, raw in zip(keys, values)
+            if raw is not None
+        ]
+
+    async def summaries(self) -> List[Dict[str, Any]]:
+        """Return the job listing fields from the summary index, without touching payloads"""
+        if self._db is not None:
+            return await asyncio.to_thread(self._db_summaries)
+        if self._redis is None:
+            return [
+                summary for job_id, summary in self._summaries.items()
+                if not self._is_expired(job_id)
+            ]
+        # Index entries outlive their expired job keys; they are filtered here
+        # and pruned by expire(), which also releases their temp directories
+        now = time.time()
+        summaries = []
+        for raw in (await self._redis.hgetall(self._index_key)).values():
+            entry = orjson.loads(raw)
+            if entry.pop("expires_at") >= now:
+                entry.pop("temp_directory", None)
+                summaries.append(entry)
+        return summaries
+
+    async def _redis_expire(self) -> List[Dict[str, Any]]:
+        """Prune index entries of jobs Redis has dropped, returning their releasable parts"""
+        now = time.time()
+        entries = {
+            job_id: orjson.loads(raw)
+            for job_id, raw in (await self._redis.hgetall(self._index_key)).items()
+        }
+        gone = [job_id for job_id, entry in entries.items() if entry["expires_at"] < now]
+        # Keys can also vanish before their TTL (e.g. maxmemory eviction)
+        live = [job_id for job_id, entry in entries.items() if entry["expires_at"] >= now]
+        if live:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for job_id in live:
+                    pipe.exists(self._key(job_id.decode()))
+                present = await pipe.execute()
+            gone.extend(job_id for job_id, exists in zip(live, present) if not exists)
+        if gone:
+            await self._redis.hdel(self._index_key, *gone)
+        return [{"results": {"temp_directory": entries[job_id].get("temp_directory")}} for job_id in gone]
+
+    async def expire(self) -> int:
+        """Drop jobs older than the TTL, releasing their temp directories (Redis expires keys itself)"""
+        if self._redis is not None:
+            expired = await self._redis_expire()
+        elif self._db is not None:
+            expired = await asyncio.to_thread(self._db_expire)
+        else:
+            cutoff = time.monotonic() - self.ttl
+            expired = []
+            async with self.lock:
+                for job_id, stored_at in list(self._stored_at.items()):
+                    if stored_at < cutoff:
+                        expired.append(self._discard(job_id))
+        for payload in expired:
+            await self._release(payload)
+        if expired:
+            logger.info(f"🧹 Expired {len(expired)} '{self.namespace}' jobs")
+        return len(expired)
@@ -204,30 +204,35 @@ class Preprocessor:
             logger.info(f"📊 Normalizing bands in {raster_path}")
             
             with rasterio.open(raster_path) as src:
-                # Read all bands
-                data = src.read().astype(np.float32)
+                # Read all bands (converted by the reader, no astype copy)
+                data = src.read(out_dtype=np.float32)
                 
-                # Normalize each band
-                normalized_data = np.zeros_like(data)
-                for i in range(data.shape[0]):
-                    band = data[i]
-                    # Handle nodata values
-                    valid_mask = band != src.nodata if src.nodata else np.ones_like(band, dtype=bool)
-                    
-                    if np.any(valid_mask):
-                        # Normalize to 0-1 range
-                        band_min = np.percentile(band[valid_mask], 2)  # 2nd percentile
-                        band_max = np.percentile(band[valid_mask], 98)  # 98th percentile
+                if not src.nodata:
+                    # Every pixel is valid, so take all bands' 2nd/98th
+                    # percentiles in one call and stretch the stack in place
+                    normalized_data = self._stretch_bands(data, scale_factor)
+                else:
+                    # Normalize each band (its valid pixels differ per band)
+                    normalized_data = np.zeros_like(data)
+                    for i in range(data.shape[0]):
+                        band = data[i]
+                        # Handle nodata values
+                        valid_mask = band != src.nodata
                         
-                        if band_max > band_min:
-                            normalized_band = (band - band_min) / (band_max - band_min)
-                            normalized_band = np.clip(normalized_band, 0, 1)
+                        if np.any(valid_mask):
+                            # Normalize to 0-1 range; both percentiles come from
+                            # one gather and one partition of the valid pixels
+                            band_min, band_max = np.percentile(band[valid_mask], [2, 98])
+                            
+                            if band_max > band_min:
+                                # Written straight into the output band, no temporaries
+                                np.subtract(band, band_min, out=normalized_data[i])
+                                normalized_data[i] /= band_max - band_min
+                                np.clip(normalized_data[i], 0, 1, out=normalized_data[i])
+                            else:
+                                np.divide(band, scale_factor, out=normalized_data[i])
                         else:
-                            normalized_band = band / scale_factor
-                        
-                        normalized_data[i] = normalized_band
-                    else:
-                        normalized_data[i] = band / scale_factor
+                            np.divide(band, scale_factor, out=normalized_data[i])
                 
                 # Write normalized raster
                 dst_kwargs = src.profile.copy()
@@ -243,6 +248,25 @@ class Preprocessor:
             logger.error(f"❌ Error normalizing bands: {e}")
             return False
     
+    def _stretch_bands(self, data: np.ndarray, scale_factor: float) -> np.ndarray:
+        """
+        Stretch every band of a fully valid stack to 0-1 between its 2nd and 98th percentiles
+        
+        Bands with no spread between the percentiles fall back to a plain
+        division by scale_factor. Works in place on data.
+        """
+        lows, highs = np.percentile(data.reshape(data.shape[0], -1), [2, 98], axis=1)
+        spread = highs > lows
+        
+        # One broadcast subtract/divide over the stack; flat bands use (band - 0) / scale_factor
+        offsets = np.where(spread, lows, 0).astype(np.float32)
+        scales = np.where(spread, highs - lows, scale_factor).astype(np.float32)
+        data -= offsets[:, None, None]
+        data /= scales[:, None, None]
+        for i in np.flatnonzero(spread):
+            np.clip(data[i], 0, 1, out=data[i])
+        return data
+    
     def fill_dem_voids(self, dem_path: str, dst_path: str, 
                       method: str = "gdal") -> bool:
         """
@@ -260,7 +284,7 @@ class Preprocessor:
             logger.info(f"🕳️ Filling DEM voids in {dem_path}")
             
             with rasterio.open(dem_path) as src:
-                dem_data = src.read(1).astype(np.float32)
+                dem_data = src.read(1, out_dtype=np.float32)
                 
                 if method == "gdal":
                     # Use GDAL's fill nodata algorithm
@@ -292,31 +316,17 @@ class Preprocessor:
             else:
                 valid_mask = ~np.isnan(data)
             
-            if np.all(valid_mask):
+            if np.all(valid_mask) or not np.any(valid_mask):
                 return data
             
-            # Use scipy's binary dilation to expand valid areas
-            from scipy.ndimage import binary_dilation
-            
-            # Dilate valid areas
-            dilated_mask = binary_dilation(valid_mask, iterations=3)
-            
-            # Interpolate using griddata
-            y, x = np.mgrid[0:data.shape[0], 0:data.shape[1]]
-            points = np.column_stack((y[valid_mask], x[valid_mask]))
-            values = data[valid_mask]
-            
-            # Create grid for interpolation
-            grid_y, grid_x = np.mgrid[0:data.shape[0], 0:data.shape[1]]
-            grid_points = np.column_stack((grid_y.ravel(), grid_x.ravel()))
-            
-            # Interpolate
-            filled_values = griddata(points, values, grid_points, method='linear')
-            filled_data = filled_values.reshape(data.shape)
-            
-            # Fill remaining holes with nearest neighbor
-            filled_data = griddata(points, values, grid_points, method='nearest')
-            filled_data = filled_data.reshape(data.shape)
+            # Nearest-valid-pixel fill in one pass: the Euclidean distance
+            # transform of the void mask also yields, for every pixel, the
+            # index of its nearest valid pixel, so no point lists, KD-tree or
+            # full-grid interpolation are needed
+            nearest = ndimage.distance_transform_edt(
+                ~valid_mask, return_distances=False, return_indices=True
+            )
+            filled_data = data[tuple(nearest)]
             
             return filled_data
             
@@ -383,7 +393,7 @@ class Preprocessor:
             logger.info(f"🌊 Smoothing DEM: {dem_path}")
             
             with rasterio.open(dem_path) as src:
-                dem_data = src.read(1).astype(np.float32)
+                dem_data = src.read(1, out_dtype=np.float32)
                 
                 # Apply Gaussian smoothing
                 smoothed_data = ndimage.gaussian_filter(dem_data, sigma=sigma)
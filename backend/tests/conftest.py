@@ -0,0 +1,8 @@
+"""
+Shared pytest setup: the backend modules are imported top-level (as app.py does)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
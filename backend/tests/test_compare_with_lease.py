@@ -0,0 +1,201 @@
+"""
+Tests for the lease comparison against a straightforward per-polygon reference
+"""
+
+import json
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import Polygon, box
+
+from compare_with_lease import EQUAL_AREA_CRS, IllegalMiningDetector, _round_values
+
+# Metres in EQUAL_AREA_CRS; 100 m x 100 m = 1 ha
+LEASES = gpd.GeoDataFrame({
+    'lease_id': ['L1', 'L2', 'L3'],
+    'lease_name': ['North pit', 'South pit', 'Quarry'],
+    'geometry': [
+        box(0, 0, 1000, 1000),
+        box(1000, 0, 1500, 400),
+        Polygon([(3000, 0), (4000, 0), (3000, 1000)]),
+    ]
+}, crs=EQUAL_AREA_CRS)
+
+
+def _detections(geoms):
+    return gpd.GeoDataFrame({
+        'detection_id': range(len(geoms)),
+        'geometry': geoms
+    }, crs=EQUAL_AREA_CRS)
+
+
+def _reference(detector, detected, leases):
+    """Baseline comparison: one polygon at a time with plain shapely overlays"""
+    union = shapely.union_all(np.asarray(leases.geometry))
+    if detector.buffer_meters > 0:
+        union = union.buffer(detector.buffer_meters)
+    rows = []
+    for geom in detected.geometry:
+        total = geom.area / 10000
+        if any(lease.covers(geom) for lease in leases.geometry):
+            inside = total
+        else:
+            inside = geom.intersection(union).area / 10000
+        outside = total - inside if inside == total else geom.difference(union).area / 10000
+        overlap = inside / total * 100 if total > 0 else 0
+        leases_hit = [
+            {'lease_id': lease_id, 'lease_name': name,
+             'overlap_area_ha': round(total if lease.covers(geom) else geom.intersection(lease).area / 10000, 2)}
+            for lease_id, name, lease in zip(leases['lease_id'], leases['lease_name'], leases.geometry)
+            if lease.intersects(geom)
+        ]
+        if outside <= detector.tolerance_ha:
+            status = 'legal'
+        elif overlap >= 80:
+            status = 'mixed'
+        else:
+            status = 'illegal'
+        base = 0.95 if overlap >= 95 else 0.85 if overlap >= 80 else 0.70 if overlap >= 50 else 0.60
+        area_factor = 1.0 if total >= 10 else 0.9 if total >= 1 else 0.8
+        lease_factor = 1.0 if len(leases_hit) == 1 else 0.9 if leases_hit else 0.8
+        rows.append({
+            'total_area_ha': round(total, 2),
+            'inside_area_ha': round(inside, 2),
+            'outside_area_ha': round(outside, 2),
+            'overlap_percentage': round(overlap, 1),
+            'status': status,
+            'confidence': round(min(max(base * area_factor * lease_factor, 0.0), 1.0), 2),
+            'overlapping_leases': leases_hit,
+            'num_overlapping_leases': len(leases_hit),
+            'illegal_area_ha': round(outside, 2) if status in ('illegal', 'mixed') else 0
+        })
+    return rows
+
+
+def _synthetic_detections(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(-500, 4500, n)
+    y = rng.uniform(-300, 1300, n)
+    w = rng.uniform(20, 600, n)
+    h = rng.uniform(20, 600, n)
+    geoms = [box(x0, y0, x0 + dx, y0 + dy) for x0, y0, dx, dy in zip(x, y, w, h)]
+    # A few non-rectangular detections exercise the exact (non-envelope) paths
+    geoms += [box(100, 100, 300, 300).buffer(50), Polygon([(900, 100), (1200, 100), (1100, 350)])]
+    return _detections(geoms)
+
+
+@pytest.mark.parametrize('buffer_meters', [0.0, 10.0])
+def test_matches_reference_on_synthetic_boxes(buffer_meters):
+    detector = IllegalMiningDetector(buffer_meters)
+    detected = _synthetic_detections()
+    
+    results = detector.compare_with_lease(detected, LEASES)
+    expected = _reference(detector, detected, LEASES)
+    
+    assert len(results) == len(expected)
+    for row, reference in zip(results.to_dict('records'), expected):
+        for column in ('total_area_ha', 'inside_area_ha', 'outside_area_ha',
+                       'overlap_percentage', 'confidence', 'illegal_area_ha'):
+            assert row[column] == pytest.approx(reference[column], abs=0.011), column
+        assert row['status'] == reference['status']
+        assert row['num_overlapping_leases'] == reference['num_overlapping_leases']
+        assert [lease['lease_id'] for lease in row['overlapping_leases']] == \
+            [lease['lease_id'] for lease in reference['overlapping_leases']]
+        for lease, reference_lease in zip(row['overlapping_leases'], reference['overlapping_leases']):
+            assert lease['overlap_area_ha'] == pytest.approx(reference_lease['overlap_area_ha'], abs=0.011)
+    # Extra detection columns are carried through alongside the original geometries
+    assert results['detection_id'].tolist() == detected['detection_id'].tolist()
+    assert results.geometry.geom_equals(detected.geometry).all()
+
+
+def test_hand_computed_cases():
+    detector = IllegalMiningDetector(buffer_meters=10.0)
+    detected = _detections([
+        box(100, 100, 300, 300),     # inside L1
+        box(2000, 2000, 2200, 2200),  # far from every lease
+        box(900, 500, 1100, 700),    # straddles the L1 edge, outside L2
+    ])
+    
+    results = detector.compare_with_lease(detected, LEASES)
+    
+    assert results['status'].tolist() == ['legal', 'illegal', 'illegal']
+    assert results['total_area_ha'].tolist() == [4.0, 4.0, 4.0]
+    # The 10 m tolerance buffer moves the L1 boundary out to x = 1010
+    assert results['inside_area_ha'].tolist() == [4.0, 0.0, 2.2]
+    assert results['outside_area_ha'].tolist() == [0.0, 4.0, 1.8]
+    assert results['overlap_percentage'].tolist() == [100.0, 0.0, 55.0]
+    assert results['illegal_area_ha'].tolist() == [0.0, 4.0, 1.8]
+    assert results['num_overlapping_leases'].tolist() == [1, 0, 1]
+    assert results['overlapping_leases'][0] == [
+        {'lease_id': 'L1', 'lease_name': 'North pit', 'overlap_area_ha': 4.0}
+    ]
+    assert results['overlapping_leases'][2] == [
+        {'lease_id': 'L1', 'lease_name': 'North pit', 'overlap_area_ha': 2.0}
+    ]
+
+
+def test_invalid_geometries_are_reported_as_errors():
+    detector = IllegalMiningDetector()
+    bowtie = Polygon([(100, 100), (300, 300), (300, 100), (100, 300)])
+    results = detector.compare_with_lease(_detections([box(100, 100, 300, 300), bowtie]), LEASES)
+    
+    assert results['status'].tolist() == ['legal', 'error']
+    assert results.loc[1, ['total_area_ha', 'inside_area_ha', 'outside_area_ha', 'confidence']].tolist() == [0, 0, 0, 0]
+
+
+def test_empty_inputs_return_empty_frame():
+    detector = IllegalMiningDetector()
+    assert detector.compare_with_lease(_detections([]), LEASES).empty
+    assert detector.compare_with_lease(_detections([box(0, 0, 1, 1)]), LEASES.iloc[:0]).empty
+
+
+def test_round_values_matches_python_round():
+    values = np.array([0.005, 0.015, 0.025, 0.065, 0.765, 1.005, 2.675, -0.125])
+    assert _round_values(values, 2).tolist() == [round(value, 2) for value in values.tolist()]
+
+
+def test_summary_statistics():
+    detector = IllegalMiningDetector(buffer_meters=10.0)
+    detected = _detections([
+        box(100, 100, 300, 300),
+        box(2000, 2000, 2200, 2200),
+        box(900, 500, 1100, 700),
+        box(0, 0, 990, 990),          # 98.01 ha, legal
+    ])
+    results = detector.compare_with_lease(detected, LEASES)
+    
+    summary = detector.generate_summary_statistics(results)
+    
+    assert summary == {
+        'total_detected_areas': 4,
+        'legal_areas': 2,
+        'illegal_areas': 2,
+        'mixed_areas': 0,
+        'total_detected_area_ha': 110.01,
+        'legal_area_ha': 102.01,
+        'illegal_area_ha': 5.8,
+        'compliance_rate_percent': 92.7,
+        'violation_rate_percent': 5.3,
+        'average_confidence': round(float(results['confidence'].mean()), 2)
+    }
+    assert all(type(value) in (int, float) for value in summary.values())
+    assert detector.generate_summary_statistics(gpd.GeoDataFrame())['total_detected_areas'] == 0
+
+
+def test_export_results(tmp_path):
+    detector = IllegalMiningDetector()
+    results = detector.compare_with_lease(
+        _detections([box(100, 100, 300, 300), box(2000, 2000, 2200, 2200)]), LEASES
+    )
+    
+    exported = detector.export_results(results, str(tmp_path), format='all')
+    
+    assert set(exported) == {'geojson', 'shapefile', 'csv', 'summary'}
+    assert len(gpd.read_file(exported['geojson'])) == 2
+    with open(exported['csv']) as f:
+        header = f.readline().strip().split(',')
+    assert 'geometry' not in header and 'status' in header
+    with open(exported['summary']) as f:
+        assert json.load(f) == detector.generate_summary_statistics(results)
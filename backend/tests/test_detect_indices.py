@@ -0,0 +1,134 @@
+"""
+Tests for mask generation against the full-extent (uncropped) baseline pipeline
+"""
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from scipy import ndimage
+from skimage.morphology import binary_closing, binary_opening, remove_small_objects
+
+from detect_indices import MiningDetector, _padded_bounding_window
+
+# B2, B3, B4, B8, B11, B12 reflectances
+VEGETATION = np.array([0.05, 0.08, 0.05, 0.50, 0.20, 0.10], dtype=np.float32)
+BARE_SOIL = np.array([0.10, 0.10, 0.30, 0.20, 0.40, 0.35], dtype=np.float32)
+
+TRANSFORM = from_origin(85.0, 23.0, 0.0001, 0.0001)
+
+
+def _scene(height=200, width=240, seed=0):
+    """Vegetated scene with mining-like patches, including ones at the edges and specks of noise"""
+    rng = np.random.default_rng(seed)
+    mining = np.zeros((height, width), dtype=bool)
+    mining[80:120, 100:140] = True         # large pit
+    mining[0:15, 0:20] = True              # touches the top-left corner
+    mining[150:170, 200:240] = True        # touches the right edge
+    mining[40:52, 40:52] = True            # two pits three pixels apart
+    mining[40:52, 55:67] = True
+    mining[180:184, 20:24] = True          # too small to keep
+    mining |= rng.random((height, width)) < 0.01
+    bands = np.where(mining, BARE_SOIL[:, None, None], VEGETATION[:, None, None])
+    bands = bands + rng.normal(0, 0.01, bands.shape).astype(np.float32)
+    return bands.astype(np.float32)
+
+
+def _write_scene(path, bands):
+    with rasterio.open(path, 'w', driver='GTiff', height=bands.shape[1], width=bands.shape[2],
+                       count=6, dtype='float32', crs='EPSG:4326', transform=TRANSFORM) as dst:
+        dst.write(bands)
+    return str(path)
+
+
+def _baseline_mask(detector, bands):
+    """The original pipeline: stacked condition count, then morphology over the whole scene"""
+    indices = detector._calculate_spectral_indices(*bands)
+    conditions = np.stack([
+        indices['ndvi'] < detector.thresholds['ndvi'],
+        indices['bsi'] > detector.thresholds['bsi'],
+        indices['ndwi'] < detector.thresholds['ndwi'],
+        indices['ndbi'] > detector.thresholds['ndbi'],
+        indices['savi'] < 0.1,
+        indices['evi'] < 0.1,
+        indices['nbr'] < 0.1,
+    ])
+    mask = np.sum(conditions, axis=0) >= 4
+    mask |= (indices['ndvi'] < 0.15) & (indices['bsi'] > 0.4) & (indices['ndbi'] > 0.2)
+    
+    cleaned = remove_small_objects(mask, min_size=50)
+    cleaned = binary_opening(cleaned, footprint=np.ones((3, 3)))
+    cleaned = binary_closing(cleaned, footprint=np.ones((5, 5)))
+    cleaned = remove_small_objects(cleaned, min_size=50)
+    cleaned = ndimage.binary_dilation(cleaned, structure=np.ones((3, 3)))
+    return ndimage.binary_erosion(cleaned, structure=np.ones((2, 2))).astype(np.uint8)
+
+
+@pytest.fixture
+def detector():
+    return MiningDetector()
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_generate_mask_matches_full_extent_baseline(detector, tmp_path, seed):
+    bands = _scene(seed=seed)
+    raster_path = _write_scene(tmp_path / 'scene.tif', bands)
+    
+    result = detector.generate_mask(raster_path, str(tmp_path / 'mask.tif'))
+    expected = _baseline_mask(detector, bands)
+    
+    assert result['mask'].dtype == np.uint8
+    np.testing.assert_array_equal(result['mask'], expected)
+    assert result['statistics']['total_pixels'] == int(expected.sum())
+    with rasterio.open(tmp_path / 'mask.tif') as src:
+        np.testing.assert_array_equal(src.read(1), expected)
+
+
+def test_generate_mask_cropped_to_a_small_patch(detector, tmp_path):
+    # A single patch far from the edges exercises the bounding-box crop alone
+    bands = np.broadcast_to(VEGETATION[:, None, None], (6, 300, 300)).copy()
+    bands[:, 140:170, 150:175] = BARE_SOIL[:, None, None]
+    raster_path = _write_scene(tmp_path / 'scene.tif', bands)
+    
+    result = detector.generate_mask(raster_path)
+    
+    np.testing.assert_array_equal(result['mask'], _baseline_mask(detector, bands))
+    assert result['mask'].any()
+
+
+def test_generate_mask_without_detections(detector, tmp_path):
+    bands = np.broadcast_to(VEGETATION[:, None, None], (6, 64, 64)).copy()
+    raster_path = _write_scene(tmp_path / 'scene.tif', bands)
+    
+    result = detector.generate_mask(raster_path, str(tmp_path / 'mask.tif'))
+    
+    assert result['mask'].dtype == np.uint8
+    assert not result['mask'].any()
+    assert result['statistics']['total_pixels'] == 0
+    assert result['statistics']['total_area_ha'] == 0
+    with rasterio.open(tmp_path / 'mask.tif') as src:
+        assert not src.read(1).any()
+
+
+def test_padded_bounding_window():
+    mask = np.zeros((20, 30), dtype=np.uint8)
+    mask[5:8, 10:12] = 1
+    assert _padded_bounding_window(mask, 2) == (slice(3, 10), slice(8, 14))
+    # Clipped to the array at the edges
+    mask[19, 0] = 1
+    assert _padded_bounding_window(mask, 4) == (slice(1, 20), slice(0, 16))
+
+
+def test_detect_mining_polygons_drops_raster_arrays(detector, tmp_path):
+    raster_path = _write_scene(tmp_path / 'scene.tif', _scene())
+    
+    full = detector.detect_mining_areas(raster_path, str(tmp_path / 'full'))
+    slim = detector.detect_mining_polygons(raster_path, str(tmp_path / 'slim'))
+    
+    assert set(full['detection_results']) - set(slim['detection_results']) == {'mask', 'indices'}
+    assert slim['detection_results']['statistics'] == full['detection_results']['statistics']
+    assert slim['summary'] == full['summary']
+    assert slim['summary']['total_polygons'] > 0
+    assert slim['polygons'].geometry.geom_equals(full['polygons'].geometry).all()
+    with rasterio.open(slim['mask_path']) as src:
+        np.testing.assert_array_equal(src.read(1), full['detection_results']['mask'])
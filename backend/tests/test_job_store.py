@@ -0,0 +1,146 @@
+"""
+Tests for the job store across its in-memory, SQLite and Redis backends
+"""
+
+import asyncio
+
+import pytest
+
+from job_store import JobStore
+
+pytestmark = pytest.mark.asyncio
+
+
+def _memory_store(tmp_path, **kwargs):
+    return JobStore('test', redis_url='', db_path='', **kwargs)
+
+
+def _sqlite_store(tmp_path, **kwargs):
+    return JobStore('test', redis_url='', db_path=str(tmp_path / 'jobs.db'), **kwargs)
+
+
+def _redis_store(tmp_path, **kwargs):
+    fakeredis = pytest.importorskip('fakeredis')
+    store = JobStore('test', redis_url='redis://localhost:6379/0', db_path='', **kwargs)
+    store._redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    return store
+
+
+@pytest.fixture(params=[_memory_store, _sqlite_store, _redis_store], ids=['memory', 'sqlite', 'redis'])
+def make_store(request, tmp_path):
+    """Factory building a JobStore on each backend"""
+    return lambda **kwargs: request.param(tmp_path, **kwargs)
+
+
+def _job(temp_dir=None, **fields):
+    payload = {'status': 'processing', 'timestamp': '2024-01-01T00:00:00', 'progress': 0}
+    if temp_dir is not None:
+        payload['results'] = {'temp_directory': str(temp_dir)}
+    payload.update(fields)
+    return payload
+
+
+async def test_set_get_roundtrip(make_store):
+    store = make_store()
+    await store.set('a', _job(message='queued'))
+    
+    job = await store.get('a')
+    assert job['status'] == 'processing'
+    assert job['message'] == 'queued'
+    assert await store.contains('a')
+    assert await store.get('missing') is None
+    assert not await store.contains('missing')
+
+
+async def test_update_merges_fields_and_summaries(make_store):
+    store = make_store()
+    await store.set('a', _job())
+    await store.update('a', status='completed', progress=100, results={'summary': {'count': 3}})
+    
+    job = await store.get('a')
+    assert job['status'] == 'completed'
+    assert job['progress'] == 100
+    assert job['results'] == {'summary': {'count': 3}}
+    assert await store.summaries() == [{
+        'job_id': 'a', 'status': 'completed', 'timestamp': '2024-01-01T00:00:00', 'progress': 100
+    }]
+
+
+async def test_update_of_missing_job_is_dropped(make_store):
+    store = make_store()
+    await store.update('missing', status='completed')
+    assert await store.get('missing') is None
+    assert await store.summaries() == []
+
+
+async def test_items_lists_every_job(make_store):
+    store = make_store()
+    await store.set('a', _job())
+    await store.set('b', _job(status='completed'))
+    
+    items = dict(await store.items())
+    assert set(items) == {'a', 'b'}
+    assert items['b']['status'] == 'completed'
+
+
+async def test_expire_drops_jobs_and_releases_temp_dirs(make_store, tmp_path):
+    store = make_store(ttl=1)
+    temp_dir = tmp_path / 'job_a'
+    temp_dir.mkdir()
+    await store.set('a', _job(temp_dir))
+    
+    assert await store.expire() == 0
+    assert temp_dir.is_dir()
+    
+    await asyncio.sleep(1.1)
+    assert await store.get('a') is None
+    assert not await store.contains('a')
+    assert await store.summaries() == []
+    assert await store.expire() == 1
+    assert not temp_dir.exists()
+    assert await store.expire() == 0
+
+
+async def test_update_rearms_ttl(make_store, tmp_path):
+    # Redis rounds TTLs to whole seconds, so the margins are kept wide
+    store = make_store(ttl=3)
+    temp_dir = tmp_path / 'job_a'
+    temp_dir.mkdir()
+    await store.set('a', _job(temp_dir))
+    
+    # A job still reporting progress must outlive its original TTL
+    await asyncio.sleep(1.5)
+    await store.update('a', progress=50)
+    await asyncio.sleep(1.6)
+    
+    assert (await store.get('a'))['progress'] == 50
+    assert await store.expire() == 0
+    assert temp_dir.is_dir()
+
+
+async def test_memory_eviction_prefers_unread_jobs(tmp_path):
+    store = _memory_store(tmp_path, max_jobs=4)
+    temp_dirs = {}
+    for job_id in 'abcd':
+        temp_dirs[job_id] = tmp_path / job_id
+        temp_dirs[job_id].mkdir()
+        await store.set(job_id, _job(temp_dirs[job_id]))
+    
+    # A job that has been read is protected; the oldest unread one goes first
+    assert await store.get('a') is not None
+    await store.set('e', _job())
+    
+    assert await store.contains('a')
+    assert not await store.contains('b')
+    assert not temp_dirs['b'].exists()
+    assert all(temp_dirs[job_id].is_dir() for job_id in 'acd')
+    assert {summary['job_id'] for summary in await store.summaries()} == set('acde')
+
+
+async def test_payloads_with_numpy_values_are_stored(make_store):
+    np = pytest.importorskip('numpy')
+    store = make_store()
+    await store.set('a', _job(results={'statistics': {'total_pixels': np.int64(7), 'area': np.float32(1.5)}}))
+    
+    job = await store.get('a')
+    assert job['results']['statistics'] == {'total_pixels': 7, 'area': 1.5}